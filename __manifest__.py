@@ -1,6 +1,6 @@
 {
     'name': 'Maintenance Time Records',
-    'version': '16.0.1.0.0',
+    'version': '16.0.1.3.0',
     'summary': 'Registros de tiempos de mantenimiento basados en partes de horas',
     'category': 'Maintenance',
     'author': 'Noelia Rio',
@@ -19,11 +19,21 @@
         'data/ir_sequence_data.xml',
         'data/maintenance_stage_data.xml',
         'data/maintenance_pause_cause_data.xml',
+        'data/ir_cron_data.xml',
         'views/view_maintenance_plan_form.xml',
+        'views/view_maintenance_analytic_settings.xml',
         'views/view_maintenance_request_form.xml',
         'views/view_maintenance_kanban_technical.xml',
-        'views/view_maintenance_time_records.xml'
+        'views/view_maintenance_time_records.xml',
+        'views/view_maintenance_request_actions.xml',
+        'views/view_maintenance_perf_metric.xml',
+        'views/view_maintenance_time_report.xml',
+        'views/view_maintenance_forecast.xml',
+        'views/view_maintenance_reliability.xml'
     ],
+    'external_dependencies': {
+        'python': ['numpy', 'xlsxwriter'],
+    },
     'post_init_hook': 'post_init_hook',
     'installable': True,
     'application': False,
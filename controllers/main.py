@@ -0,0 +1,84 @@
+from odoo import fields, http
+from odoo.http import content_disposition, request
+from werkzeug.exceptions import Forbidden, NotFound
+
+from ..models.maintenance_time_export import EXPORT_FORMATS
+
+# (modelo, campo solicitado) -> (campo hasta el registro dueño del documento, campo binario de origen)
+DOCUMENT_FIELDS = {
+    ('maintenance.equipment', 'manual_pdf'): (None, 'manual_pdf'),
+    ('maintenance.equipment', 'manual_pdf_view'): (None, 'manual_pdf'),
+    ('maintenance.plan', 'instruction_pdf'): (None, 'instruction_pdf'),
+    ('maintenance.request', 'instruction_pdf'): ('maintenance_plan_id', 'instruction_pdf'),
+}
+
+
+class MaintenanceDocumentController(http.Controller):
+
+    @http.route(
+        '/maintenance_time_records/document/<string:model>/<int:res_id>/<string:field>',
+        type='http', auth='user', methods=['GET', 'HEAD'],
+    )
+    def maintenance_document(self, model, res_id, field, **kwargs):
+        """Servir manuales e instructivos desde su único adjunto.
+
+        El archivo se envía por streaming desde el filestore, con ETag igual
+        al checksum del adjunto, respuestas 304 y soporte de HTTP Range.
+        """
+        if (model, field) not in DOCUMENT_FIELDS:
+            raise NotFound()
+        record = request.env[model].browse(res_id).exists()
+        if not record:
+            raise NotFound()
+        record.check_access_rights('read')
+        record.check_access_rule('read')
+
+        owner_field, source_field = DOCUMENT_FIELDS[(model, field)]
+        owner = record.sudo()[owner_field] if owner_field else record.sudo()
+        if not owner:
+            raise NotFound()
+        stream = request.env['ir.binary']._get_stream_from(owner, source_field, mimetype='application/pdf')
+        return stream.get_response(as_attachment=False, immutable=bool(kwargs.get('unique')))
+
+
+class MaintenanceTimerSyncController(http.Controller):
+
+    @http.route('/maintenance_time_records/timer/sync', type='json', auth='user', methods=['POST'])
+    def maintenance_timer_sync(self, events=None, **kwargs):
+        """Sincronizar en una sola llamada los eventos de cronómetro registrados sin conexión."""
+        return request.env['maintenance.timer.event']._sync_events(events or [])
+
+    @http.route('/maintenance_time_records/timer/current', type='json', auth='user', methods=['POST'])
+    def maintenance_timer_current(self, **kwargs):
+        """Devolver el cronómetro en curso del usuario, o ``False`` si no tiene ninguno."""
+        record = request.env['maintenance.time_records']._get_running_timer()
+        if not record:
+            return False
+        return {
+            'request_id': record.maintenance_request_id.id,
+            'request_name': record.maintenance_request_id.display_name,
+            'start_datetime': record.start_datetime,
+        }
+
+
+class MaintenanceTimeExportController(http.Controller):
+
+    @http.route('/maintenance_time_records/export/time_records', type='http', auth='user', methods=['GET'])
+    def maintenance_time_export(self, file_format='csv', since=None, feed=None, **kwargs):
+        """Descargar los registros de tiempo por streaming, sin cargarlos en memoria.
+
+        ``since`` limita la exportación a los registros modificados después de
+        esa fecha; ``feed`` usa y avanza la marca de agua de ese destino.
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise NotFound()
+        if not request.env.user.has_group('maintenance_time_records.group_maintenance_technical_admin'):
+            raise Forbidden()
+        filename = 'registros_tiempo_%s.%s' % (fields.Datetime.now().strftime('%Y%m%d_%H%M%S'), file_format)
+        stream = request.env['maintenance.time.export']._stream_export(
+            file_format=file_format, since=since, feed=feed,
+        )
+        return request.make_response(stream, headers=[
+            ('Content-Type', EXPORT_FORMATS[file_format]),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
@@ -0,0 +1,17 @@
+def migrate(cr, version):
+    """Inicializar el tiempo activo acumulado de las solicitudes existentes."""
+    cr.execute(
+        """
+        UPDATE maintenance_request r
+           SET active_duration_closed_seconds = t.seconds,
+               duration = ROUND((t.seconds / 3600.0)::numeric, 2)
+          FROM (
+                SELECT maintenance_request_id,
+                       SUM(GREATEST(EXTRACT(EPOCH FROM end_datetime - start_datetime), 0)) AS seconds
+                  FROM maintenance_time_records
+                 WHERE time_type = 'active' AND end_datetime IS NOT NULL
+              GROUP BY maintenance_request_id
+               ) t
+         WHERE r.id = t.maintenance_request_id
+        """
+    )
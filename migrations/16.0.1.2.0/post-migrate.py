@@ -0,0 +1,10 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Eliminar la copia almacenada del manual: ahora se lee del adjunto de ``manual_pdf``."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['ir.attachment'].search([
+        ('res_model', '=', 'maintenance.equipment'),
+        ('res_field', '=', 'manual_pdf_view'),
+    ]).unlink()
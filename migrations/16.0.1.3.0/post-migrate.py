@@ -0,0 +1,20 @@
+from odoo.tools.sql import column_exists
+
+
+def migrate(cr, version):
+    """Eliminar el inicio del tramo activo guardado y marcar los cronómetros finalizados.
+
+    El tramo abierto se suma al leer. El estado 'done' se lee del antiguo
+    ``time_state`` almacenado si existe y, si no, de las fechas de ejecución.
+    """
+    cr.execute("ALTER TABLE maintenance_request DROP COLUMN IF EXISTS active_interval_start")
+    if column_exists(cr, 'maintenance_request', 'time_state'):
+        cr.execute("UPDATE maintenance_request SET time_finished = (time_state = 'done')")
+        cr.execute("ALTER TABLE maintenance_request DROP COLUMN time_state")
+    else:
+        cr.execute(
+            """
+            UPDATE maintenance_request
+               SET time_finished = (start_date IS NOT NULL AND end_date IS NOT NULL)
+            """
+        )
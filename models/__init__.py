@@ -1,7 +1,17 @@
+from . import ir_attachment
+from . import ir_sequence
 from . import maintenance_plan
 from . import maintenance_equipment
+from . import maintenance_equipment_category
 from . import maintenance_request
 from . import maintenance_finish_confirmation
+from . import maintenance_forecast
+from . import maintenance_time_export
 from . import maintenance_time_records
+from . import maintenance_time_report
+from . import maintenance_timer_event
 from . import maintenance_pause_cause
 from . import maintenance_pause_wizard
+from . import maintenance_perf_metric
+from . import maintenance_stage
+from . import res_company
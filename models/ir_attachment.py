@@ -0,0 +1,16 @@
+from odoo import api, models
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    @api.model
+    def _get_field_checksums(self, res_model, res_field, res_ids):
+        """Devolver ``{res_id: checksum}`` del adjunto de un campo binario, sin leer su contenido."""
+        if not res_ids:
+            return {}
+        attachments = self.sudo().search_read(
+            [('res_model', '=', res_model), ('res_field', '=', res_field), ('res_id', 'in', list(res_ids))],
+            ['res_id', 'checksum'],
+        )
+        return {attachment['res_id']: attachment['checksum'] for attachment in attachments}
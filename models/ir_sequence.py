@@ -0,0 +1,38 @@
+from odoo import api, models
+from odoo.addons.base.models.ir_sequence import _update_nogap
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    @api.model
+    def _next_block_by_code(self, sequence_code, count):
+        """Reservar ``count`` valores consecutivos de una secuencia.
+
+        Equivale a llamar ``count`` veces a ``next_by_code`` pero reserva todo
+        el bloque en una sola consulta. Las secuencias con rangos de fechas se
+        resuelven valor a valor.
+        """
+        if count <= 0:
+            return []
+        self.check_access_rights('read')
+        company_id = self.env.company.id
+        sequence = self.search(
+            [('code', '=', sequence_code), ('company_id', 'in', [company_id, False])],
+            order='company_id',
+            limit=1,
+        )
+        if not sequence:
+            return [False] * count
+        if sequence.use_date_range:
+            return [sequence._next() for __ in range(count)]
+        if sequence.implementation == 'standard':
+            self._cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                ('ir_sequence_%03d' % sequence.id, count),
+            )
+            numbers = [row[0] for row in self._cr.fetchall()]
+        else:
+            number_next = _update_nogap(sequence, sequence.number_increment * count)
+            numbers = [number_next + index * sequence.number_increment for index in range(count)]
+        return [sequence.get_next_char(number) for number in numbers]
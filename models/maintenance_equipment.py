@@ -1,26 +1,113 @@
+from collections import defaultdict
 from odoo import models, fields, api
+from odoo.tools import split_every
 import qrcode
 import base64
+import functools
+import hashlib
+import threading
+import numpy as np
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 from dateutil.relativedelta import relativedelta
 from odoo.exceptions import ValidationError
 import logging
+from .maintenance_perf_metric import instrumented
+from .maintenance_stage import STAGE_ROLE_DONE, STAGE_ROLE_IN_PROGRESS, STAGE_ROLE_NEW, STAGE_ROLE_REVISION
 
 _logger = logging.getLogger(__name__)
 
+STATUS_BATCH_SIZE = 1000
+STATUS_LAST_RUN_PARAM = 'maintenance_time_records.equipment_status_last_run'
+QR_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+QR_BATCH_SIZE = 500
+QR_CURSOR_PARAM = 'maintenance_time_records.qr_generation_last_equipment_id'
+RELIABILITY_FIELDS = ['failure_count', 'mtbf_hours', 'mttr_hours', 'availability']
+
+
+@functools.lru_cache(maxsize=None)
+def _get_qr_label_font():
+    """Cargar la fuente de las etiquetas una sola vez por proceso."""
+    return ImageFont.truetype(QR_FONT_PATH, 24)
+
+
+def _get_qr_label_hash(base_url, record_id, name):
+    return hashlib.sha1(f"{base_url}|{record_id}|{name}".encode()).hexdigest()
+
+
+def _render_qr_label(qr_url, text):
+    """Componer el código QR con el nombre debajo y devolver el PNG en base64."""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(qr_url)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill='black', back_color='white')
+    img = img.convert('RGB')
+    qr_width, qr_height = img.size
+
+    draw = ImageDraw.Draw(img)
+    font = _get_qr_label_font()
+
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    final_width = max(qr_width, text_width)
+
+    new_height = qr_height + text_height + 20
+    new_img = Image.new('RGB', (final_width, new_height), 'white')
+
+    qr_position = ((final_width - qr_width) // 2, 0)
+    new_img.paste(img, qr_position)
+
+    text_position = ((final_width - text_width) // 2, qr_height + 10)
+    draw = ImageDraw.Draw(new_img)
+    draw.text(text_position, text, fill='black', font=font)
+
+    buffer = BytesIO()
+    new_img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue())
+
+
+def _compute_reliability(failure_counts, repair_seconds, window_seconds):
+    """Calcular MTBF, MTTR (en horas) y disponibilidad (%) para arreglos de totales.
+
+    El tiempo de funcionamiento es la ventana de observación menos el tiempo
+    en reparación; sin fallas, MTBF y MTTR valen 0 y la disponibilidad 100.
+    """
+    window_seconds = np.maximum(window_seconds, repair_seconds)
+    uptime_seconds = window_seconds - repair_seconds
+    failures = np.maximum(failure_counts, 1)
+    has_failures = failure_counts > 0
+    mtbf = np.where(has_failures, uptime_seconds / failures / 3600.0, 0.0)
+    mttr = np.where(has_failures, repair_seconds / failures / 3600.0, 0.0)
+    availability = np.where(
+        window_seconds > 0, uptime_seconds / np.maximum(window_seconds, 1.0) * 100.0, 100.0
+    )
+    return np.round(mtbf, 2), np.round(mttr, 2), np.round(availability, 2)
+
 
 class MaintenanceEquipment(models.Model):
     _inherit = 'maintenance.equipment'
 
     qr_code_image = fields.Binary(string="QR Code", attachment=True, readonly=True)
+    qr_code_hash = fields.Char(string="Huella del código QR", readonly=True, copy=False)
     reception_date = fields.Date(string="Fecha de recepción")
     warranty_expiration_date = fields.Date(string="Fecha de vencimiento de garantía")
     manual_pdf = fields.Binary(string="Manual PDF (Editable)", help="Cargar el PDF del manual de mantenimiento.", store=True)
     manual_pdf_view = fields.Binary(
         string="Manual PDF",
-        compute="_compute_manual_pdf_view",
-        store=True
+        related="manual_pdf",
+        readonly=True
+    )
+    manual_pdf_url = fields.Char(
+        string="Enlace al manual",
+        compute="_compute_manual_pdf_url"
     )
     status = fields.Selection(
         [('aprobado', 'Aprobado'), ('desaprobado', 'Desaprobado')],
@@ -28,139 +115,389 @@ class MaintenanceEquipment(models.Model):
         compute='_compute_status',
         store=True
     )
+    failure_count = fields.Integer(string="Fallas", readonly=True, copy=False)
+    mtbf_hours = fields.Float(
+        string="MTBF (horas)", readonly=True, copy=False,
+        help="Tiempo medio entre fallas: tiempo en funcionamiento dividido por las solicitudes correctivas finalizadas."
+    )
+    mttr_hours = fields.Float(
+        string="MTTR (horas)", readonly=True, copy=False,
+        help="Tiempo medio de reparación de las solicitudes correctivas finalizadas."
+    )
+    availability = fields.Float(string="Disponibilidad (%)", readonly=True, copy=False)
 
+    @instrumented
     def recalc_equipment_computed_fields(self):
-        equipments = self.search([])
-
-        for eq in equipments:
-            eq._compute_status()
-
+        self.env.cr.execute("SELECT id FROM maintenance_equipment ORDER BY id")
+        equipment_ids = [row[0] for row in self.env.cr.fetchall()]
+        self._recalculate_status(equipment_ids)
         return True
 
-    @api.depends("manual_pdf")
-    def _compute_manual_pdf_view(self):
-        for record in self:
-            record.manual_pdf_view = record.manual_pdf
+    @instrumented
+    def recalc_equipment_status_changed(self):
+        """Recalcular el estado solo de los equipos con cambios desde la última ejecución.
+
+        Se consideran los equipos con solicitudes o planes modificados y los que
+        tienen solicitudes cuya fecha pasó a ser anterior a hoy desde entonces.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        last_run = params.get_param(STATUS_LAST_RUN_PARAM)
+        self.env.cr.execute("SELECT now() AT TIME ZONE 'UTC'")
+        run_started = self.env.cr.fetchone()[0]
+        if not last_run:
+            self.recalc_equipment_computed_fields()
+        else:
+            last_run = fields.Datetime.to_datetime(last_run)
+            self.env['maintenance.request'].flush_model(['equipment_id', 'request_date'])
+            self.env['maintenance.plan'].flush_model(['equipment_id'])
+            self.env.cr.execute(
+                """
+                SELECT equipment_id FROM maintenance_request
+                 WHERE equipment_id IS NOT NULL
+                   AND (write_date >= %s OR (request_date >= %s AND request_date < %s))
+                 UNION
+                SELECT equipment_id FROM maintenance_plan
+                 WHERE equipment_id IS NOT NULL AND write_date >= %s
+                """,
+                (last_run, last_run.date(), fields.Date.today(), last_run),
+            )
+            equipment_ids = sorted(row[0] for row in self.env.cr.fetchall())
+            self._recalculate_status(equipment_ids)
+        params.set_param(STATUS_LAST_RUN_PARAM, fields.Datetime.to_string(run_started))
+        return True
 
-    def _create_new_request(self, mtn_plan):
-        horizon_date = fields.Date.today() + mtn_plan.get_relativedelta(
-            mtn_plan.maintenance_plan_horizon, mtn_plan.planning_step or "year"
+    @api.model
+    def _recalculate_status(self, equipment_ids):
+        self.flush_model(['status'])
+        updated = 0
+        for chunk in split_every(STATUS_BATCH_SIZE, equipment_ids):
+            statuses = self.browse(chunk)._get_status_values()
+            updated += self._write_status_values(statuses)
+        _logger.info(
+            "Estado de aprobación recalculado para %s equipos (%s modificados).",
+            len(equipment_ids), updated
+        )
+        return updated
+
+    @api.model
+    def _write_status_values(self, statuses):
+        """Escribir los estados agrupados por valor, solo en las filas que cambian."""
+        ids_by_status = {}
+        for equipment_id, status in statuses.items():
+            ids_by_status.setdefault(status, []).append(equipment_id)
+        updated_ids = []
+        for status, equipment_ids in ids_by_status.items():
+            self.env.cr.execute(
+                """
+                UPDATE maintenance_equipment SET status = %s
+                 WHERE id = ANY(%s) AND status IS DISTINCT FROM %s
+                RETURNING id
+                """,
+                (status, equipment_ids, status),
+            )
+            updated_ids += [row[0] for row in self.env.cr.fetchall()]
+        self.browse(updated_ids).invalidate_recordset(['status'])
+        return len(updated_ids)
+
+    def _get_status_stage_ids(self):
+        stages = self.env['maintenance.stage']
+        open_stage_ids = stages._get_stage_ids(STAGE_ROLE_NEW, STAGE_ROLE_IN_PROGRESS, STAGE_ROLE_REVISION)
+        approved_stage_ids = stages._get_stage_ids(STAGE_ROLE_DONE)
+        return list(open_stage_ids), approved_stage_ids
+
+    def _get_status_values(self):
+        """Calcular el estado de aprobación de los equipos con una consulta por lote.
+
+        Devuelve un diccionario ``{equipment_id: status}``. Los equipos con plan
+        pero sin solicitudes pasadas conservan el estado que ya tenían.
+        """
+        equipment_ids = [equipment_id for equipment_id in self._origin.ids if equipment_id]
+        if not equipment_ids:
+            return {}
+        open_stage_ids, approved_stage_ids = self._get_status_stage_ids()
+        self.env['maintenance.request'].flush_model(['equipment_id', 'stage_id', 'request_date', 'maintenance_type'])
+        self.env['maintenance.plan'].flush_model(['equipment_id', 'active'])
+        statuses = {}
+        for chunk in split_every(STATUS_BATCH_SIZE, equipment_ids):
+            self.env.cr.execute(
+                """
+                SELECT e.id,
+                       e.status,
+                       EXISTS (
+                           SELECT 1 FROM maintenance_request r
+                            WHERE r.equipment_id = e.id
+                              AND r.maintenance_type = 'corrective'
+                              AND r.stage_id = ANY(%s)
+                       ) AS has_open_corrective,
+                       EXISTS (
+                           SELECT 1 FROM maintenance_plan p
+                            WHERE p.equipment_id = e.id AND p.active
+                       ) AS has_plan,
+                       last_request.id,
+                       last_request.stage_id
+                  FROM maintenance_equipment e
+             LEFT JOIN LATERAL (
+                           SELECT r.id, r.stage_id FROM maintenance_request r
+                            WHERE r.equipment_id = e.id AND r.request_date < %s
+                         ORDER BY r.request_date DESC, r.id DESC
+                            LIMIT 1
+                       ) last_request ON TRUE
+                 WHERE e.id = ANY(%s)
+                """,
+                (open_stage_ids, fields.Date.today(), list(chunk)),
+            )
+            for equipment_id, status, has_open_corrective, has_plan, last_request_id, last_stage_id in self.env.cr.fetchall():
+                if has_open_corrective:
+                    status = 'desaprobado'
+                elif not has_plan:
+                    status = 'aprobado'
+                elif last_request_id:
+                    status = 'aprobado' if last_stage_id in approved_stage_ids else 'desaprobado'
+                statuses[equipment_id] = status
+        return statuses
+
+    def _recompute_reliability(self):
+        """Recalcular la fiabilidad de los equipos y de sus categorías completas."""
+        equipment_ids = set(self._origin.ids)
+        category_ids = self._origin.category_id.ids
+        if category_ids:
+            self.flush_model(['category_id'])
+            self.env.cr.execute(
+                "SELECT id FROM maintenance_equipment WHERE category_id = ANY(%s)", (category_ids,)
+            )
+            equipment_ids.update(row[0] for row in self.env.cr.fetchall())
+        return self._update_reliability(sorted(equipment_ids))
+
+    @api.model
+    def _cron_recompute_reliability(self):
+        """Recalcular la fiabilidad de toda la flota: la ventana de observación crece cada día."""
+        self.env.cr.execute("SELECT id FROM maintenance_equipment ORDER BY id")
+        return self._update_reliability([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _update_reliability(self, equipment_ids):
+        """Calcular MTBF, MTTR y disponibilidad en una sola pasada vectorizada y guardarlos.
+
+        Las fallas son las solicitudes correctivas en la etapa final. El tiempo
+        de reparación va del inicio al fin de la ejecución (o a la revisión),
+        y si faltan las fechas se usa el tiempo activo registrado. Las
+        categorías se agregan a partir de los totales de sus equipos, por lo
+        que ``equipment_ids`` debe incluir todos los equipos de cada categoría.
+        """
+        if not equipment_ids:
+            return 0
+        done_stage_ids = list(self.env['maintenance.stage']._get_stage_ids(STAGE_ROLE_DONE))
+        self.flush_model(['category_id', 'effective_date'])
+        self.env['maintenance.request'].flush_model([
+            'equipment_id', 'maintenance_type', 'stage_id', 'start_date', 'end_date',
+            'check_date_time', 'active_duration_closed_seconds',
+        ])
+        self.env.cr.execute(
+            """
+            SELECT id, COALESCE(category_id, 0),
+                   GREATEST(EXTRACT(EPOCH FROM (now() AT TIME ZONE 'UTC')
+                                    - COALESCE(effective_date::timestamp, create_date)), 0)
+              FROM maintenance_equipment
+             WHERE id = ANY(%s)
+          ORDER BY id
+            """,
+            (list(equipment_ids),),
         )
-        start_maintenance_date_plan = mtn_plan.start_maintenance_date
-        furthest_maintenance_request = self.env["maintenance.request"].search(
-            [
-                ("maintenance_plan_id", "=", mtn_plan.id),
-                ("request_date", ">=", start_maintenance_date_plan),
-            ],
-            order="request_date desc",
-            limit=1,
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        ids, category_ids, window_seconds = (np.array(column) for column in zip(*rows))
+        window_seconds = window_seconds.astype(float)
+
+        self.env.cr.execute(
+            """
+            SELECT equipment_id,
+                   GREATEST(COALESCE(EXTRACT(EPOCH FROM COALESCE(end_date, check_date_time) - start_date),
+                                     active_duration_closed_seconds, 0), 0)
+              FROM maintenance_request
+             WHERE equipment_id = ANY(%s)
+               AND maintenance_type = 'corrective'
+               AND stage_id = ANY(%s)
+            """,
+            (ids.tolist(), done_stage_ids),
         )
-        if furthest_maintenance_request:
-            next_maintenance_date = (
-                furthest_maintenance_request.request_date
-                + mtn_plan.get_relativedelta(
-                    mtn_plan.interval, mtn_plan.interval_step or "year"
-                )
+        failures = self.env.cr.fetchall()
+        if failures:
+            failure_equipment_ids, failure_repair_seconds = (np.array(column) for column in zip(*failures))
+            positions = np.searchsorted(ids, failure_equipment_ids)
+            failure_counts = np.bincount(positions, minlength=len(ids))
+            repair_seconds = np.bincount(
+                positions, weights=failure_repair_seconds.astype(float), minlength=len(ids)
             )
         else:
-            next_maintenance_date = mtn_plan.next_maintenance_date
+            failure_counts = np.zeros(len(ids), dtype=int)
+            repair_seconds = np.zeros(len(ids))
 
-        skip_notify_follower = mtn_plan.skip_notify_follower_on_requests
-        request_model = self.env["maintenance.request"].with_context(
-            mail_activity_quick_update=skip_notify_follower,
-            mail_auto_subscribe_no_notify=skip_notify_follower,
+        updated_ids = self._write_reliability_values(
+            self._table, ids, failure_counts,
+            *_compute_reliability(failure_counts, repair_seconds, window_seconds)
         )
-        requests = request_model
-
-        while next_maintenance_date <= horizon_date:
-            if next_maintenance_date >= fields.Date.today():
-                equipment_name = self.name or "Equipo"
-                frequency_name = self._get_frequency_name(mtn_plan.interval, mtn_plan.interval_step)
-                request_name = f"{equipment_name} ({frequency_name})"
-
-                vals = self._prepare_requests_from_plan(mtn_plan, next_maintenance_date)
-                vals.update({
-                    'maintenance_plan_id': mtn_plan.id,
-                    'name': request_name
-                })
-                _logger.debug(
-                    "Creando solicitud con maintenance_plan_id: %s para la fecha: %s y nombre: %s",
-                    mtn_plan.id, next_maintenance_date, request_name
-                )
-                requests |= request_model.create(vals)
-
-            next_maintenance_date = next_maintenance_date + mtn_plan.get_relativedelta(
-                mtn_plan.interval, mtn_plan.interval_step or "year"
+        self.browse(updated_ids).invalidate_recordset(RELIABILITY_FIELDS)
+
+        has_category = category_ids > 0
+        if has_category.any():
+            categories, category_positions = np.unique(category_ids[has_category], return_inverse=True)
+            category_failures = np.bincount(category_positions, weights=failure_counts[has_category]).astype(int)
+            category_repair = np.bincount(category_positions, weights=repair_seconds[has_category])
+            category_window = np.bincount(
+                category_positions, weights=np.maximum(window_seconds, repair_seconds)[has_category]
+            )
+            category_model = self.env['maintenance.equipment.category']
+            category_updated_ids = self._write_reliability_values(
+                category_model._table, categories, category_failures,
+                *_compute_reliability(category_failures, category_repair, category_window)
+            )
+            category_model.browse(category_updated_ids).invalidate_recordset(RELIABILITY_FIELDS)
+        _logger.info("Fiabilidad recalculada para %s equipos (%s modificados).", len(ids), len(updated_ids))
+        return len(updated_ids)
+
+    @api.model
+    def _write_reliability_values(self, table, ids, failure_counts, mtbf, mttr, availability):
+        """Escribir los indicadores con un UPDATE por lote, solo en las filas que cambian.
+
+        Devuelve los ids modificados para invalidar la caché.
+        """
+        updated_ids = []
+        for chunk in split_every(STATUS_BATCH_SIZE, range(len(ids)), list):
+            self.env.cr.execute(
+                """
+                UPDATE {table} AS t
+                   SET failure_count = v.failure_count,
+                       mtbf_hours = v.mtbf_hours,
+                       mttr_hours = v.mttr_hours,
+                       availability = v.availability
+                  FROM unnest(%s::int[], %s::int[], %s::float8[], %s::float8[], %s::float8[])
+                       AS v(id, failure_count, mtbf_hours, mttr_hours, availability)
+                 WHERE t.id = v.id
+                   AND (t.failure_count, t.mtbf_hours, t.mttr_hours, t.availability)
+                       IS DISTINCT FROM (v.failure_count, v.mtbf_hours, v.mttr_hours, v.availability)
+             RETURNING t.id
+                """.format(table=table),
+                (
+                    ids[chunk].tolist(), failure_counts[chunk].tolist(),
+                    mtbf[chunk].tolist(), mttr[chunk].tolist(), availability[chunk].tolist(),
+                ),
             )
+            updated_ids += [row[0] for row in self.env.cr.fetchall()]
+        return updated_ids
 
-        return requests
+    @api.depends("manual_pdf")
+    def _compute_manual_pdf_url(self):
+        checksums = self.env['ir.attachment']._get_field_checksums(
+            'maintenance.equipment', 'manual_pdf', self._origin.ids
+        )
+        for record in self:
+            checksum = checksums.get(record._origin.id)
+            record.manual_pdf_url = checksum and (
+                f"/maintenance_time_records/document/maintenance.equipment/{record._origin.id}/manual_pdf?unique={checksum}"
+            )
+
+    def _create_new_request(self, mtn_plan):
+        return mtn_plan._generate_requests_to_horizon()
 
     @api.depends('maintenance_ids.stage_id', 'maintenance_ids.request_date', 'maintenance_ids.maintenance_type', 'maintenance_plan_ids')
     def _compute_status(self):
+        statuses = self._get_status_values()
         for equipment in self:
-            open_corrective_request = equipment.maintenance_ids.filtered(
-                lambda r: r.maintenance_type == 'corrective' and r.stage_id.name in ['Nueva solicitud', 'En progreso', 'Revisión']
-            )
-            if open_corrective_request:
-                equipment.status = 'desaprobado'
+            if equipment._origin.id in statuses:
+                equipment.status = statuses[equipment._origin.id]
+            else:
+                equipment.status = 'aprobado' if not equipment.maintenance_plan_ids else False
 
-            elif not equipment.maintenance_plan_ids:
-                equipment.status = 'aprobado'
+    @instrumented
+    def generate_qr_code(self, force=False):
+        """Generar las etiquetas QR cuyo contenido cambió.
 
-            else:
-                previous_requests = equipment.maintenance_ids.filtered(
-                    lambda r: r.request_date and r.request_date < fields.Date.today()
-                ).sorted(key='request_date', reverse=True)
-
-                if previous_requests:
-                    last_request = previous_requests[0]
-                    if last_request.stage_id and last_request.stage_id.name in ['Reparado', 'Finalizado', 'Done']:
-                        equipment.status = 'aprobado'
-                    else:
-                        equipment.status = 'desaprobado'
-
-    def generate_qr_code(self):
+        Cada etiqueta guarda una huella de (URL base, id, nombre); las que no
+        cambiaron se omiten salvo con ``force``. Se renderizan en el proceso
+        actual por lotes de ``QR_BATCH_SIZE`` y cada lote se guarda de una vez.
+        """
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
-        for record in self:
-            qr_url = f'{base_url}/web#id={record.id}&model=maintenance.equipment&view_type=form'
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
+        generated = 0
+        for batch in split_every(QR_BATCH_SIZE, self):
+            labels = []
+            for record in batch:
+                qr_hash = _get_qr_label_hash(base_url, record.id, record.name)
+                if force or record.qr_code_hash != qr_hash:
+                    qr_url = f'{base_url}/web#id={record.id}&model=maintenance.equipment&view_type=form'
+                    labels.append((record.id, _render_qr_label(qr_url, record.name), qr_hash))
+            self._write_qr_labels(labels)
+            generated += len(labels)
+        return generated
+
+    @api.model
+    def _write_qr_labels(self, labels):
+        """Guardar un lote de etiquetas ``(equipment_id, imagen, huella)``.
+
+        Los adjuntos de la imagen se reemplazan con un único create y las
+        huellas se actualizan con un único UPDATE.
+        """
+        if not labels:
+            return
+        equipment_ids = [equipment_id for equipment_id, __, __ in labels]
+        attachments = self.env['ir.attachment'].sudo()
+        attachments.search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'qr_code_image'),
+            ('res_id', 'in', equipment_ids),
+        ]).unlink()
+        attachments.create([{
+            'name': 'qr_code_image',
+            'res_model': self._name,
+            'res_field': 'qr_code_image',
+            'res_id': equipment_id,
+            'type': 'binary',
+            'datas': image,
+        } for equipment_id, image, __ in labels])
+        self.flush_model(['qr_code_hash'])
+        self.env.cr.execute(
+            """
+            UPDATE maintenance_equipment e
+               SET qr_code_hash = v.qr_hash,
+                   write_uid = %s,
+                   write_date = (now() AT TIME ZONE 'UTC')
+              FROM unnest(%s::int[], %s::varchar[]) AS v(id, qr_hash)
+             WHERE e.id = v.id
+            """,
+            (self.env.uid, equipment_ids, [qr_hash for __, __, qr_hash in labels]),
+        )
+        self.browse(equipment_ids).invalidate_recordset(['qr_code_image', 'qr_code_hash', 'write_uid', 'write_date'])
+
+    @api.model
+    @instrumented
+    def _cron_generate_qr_codes(self, batch_size=QR_BATCH_SIZE):
+        """Regenerar por lotes las etiquetas QR existentes cuyo contenido cambió.
+
+        Se confirma cada lote y se guarda el último equipo procesado, de modo
+        que un cambio de ``web.base.url`` se reprocesa de forma acotada.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        params = self.env['ir.config_parameter'].sudo()
+        last_equipment_id = int(params.get_param(QR_CURSOR_PARAM, 0))
+        while True:
+            equipments = self.search(
+                [('id', '>', last_equipment_id), ('qr_code_image', '!=', False)],
+                order='id', limit=batch_size,
             )
-            qr.add_data(qr_url)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill='black', back_color='white')
-            img = img.convert('RGB')
-            qr_width, qr_height = img.size
-
-            draw = ImageDraw.Draw(img)
-            text = record.name
-
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-
-            final_width = max(qr_width, text_width)
-
-            new_height = qr_height + text_height + 20
-            new_img = Image.new('RGB', (final_width, new_height), 'white')
-
-            qr_position = ((final_width - qr_width) // 2, 0)
-            new_img.paste(img, qr_position)
-
-            text_position = ((final_width - text_width) // 2, qr_height + 10)
-            draw = ImageDraw.Draw(new_img)
-            draw.text(text_position, text, fill='black', font=font)
-
-            buffer = BytesIO()
-            new_img.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue())
-            record.qr_code_image = img_str
+            if not equipments:
+                break
+            generated = equipments.generate_qr_code()
+            last_equipment_id = equipments[-1].id
+            params.set_param(QR_CURSOR_PARAM, last_equipment_id)
+            _logger.info(
+                "Etiquetas QR regeneradas: %s de %s equipos (último equipo ID: %s).",
+                generated, len(equipments), last_equipment_id
+            )
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        params.set_param(QR_CURSOR_PARAM, 0)
+        return True
 
     def action_generate_qr_code(self):
         self.generate_qr_code()
@@ -186,7 +523,20 @@ class MaintenanceEquipment(models.Model):
         return f"{interval} {interval_step}"
 
     def _create_next_request(self, mtn_plan, current_request_date):
-        for equipment in self:
+        self._create_next_requests([(equipment, mtn_plan, current_request_date) for equipment in self])
+        return True
+
+    @api.model
+    def _create_next_requests(self, next_request_items):
+        """Crear en un solo lote las solicitudes siguientes y actualizar los planes agrupados por fecha.
+
+        ``next_request_items`` es una lista de ``(equipo, plan, fecha de la
+        solicitud actual)``. Si un plan aparece varias veces, conserva la
+        fecha siguiente más lejana.
+        """
+        vals_list = []
+        plan_dates = {}
+        for equipment, mtn_plan, current_request_date in next_request_items:
             if not mtn_plan:
                 raise ValidationError("La solicitud no tiene un plan de mantenimiento asociado.")
 
@@ -203,7 +553,7 @@ class MaintenanceEquipment(models.Model):
             frequency_name = self._get_frequency_name(mtn_plan.interval, mtn_plan.interval_step)
             request_name = f"{equipment_name} ({frequency_name})"
 
-            vals = {
+            vals_list.append({
                 'maintenance_plan_id': mtn_plan.id,
                 'name': request_name,
                 'request_date': next_maintenance_date,
@@ -211,11 +561,17 @@ class MaintenanceEquipment(models.Model):
                 'maintenance_type': 'preventive',
                 'equipment_id': equipment.id,
                 'user_id': equipment.technician_user_id.id if equipment.technician_user_id else False
-            }
-
-            self.env['maintenance.request'].create(vals)
-
-            mtn_plan.next_maintenance_date = next_maintenance_date
-            mtn_plan.start_maintenance_date = next_maintenance_date
-
-        return True
+            })
+            plan_dates[mtn_plan] = max(plan_dates.get(mtn_plan, next_maintenance_date), next_maintenance_date)
+
+        requests = self.env['maintenance.request'].create(vals_list)
+
+        plans_by_date = defaultdict(lambda: self.env['maintenance.plan'])
+        for mtn_plan, next_maintenance_date in plan_dates.items():
+            plans_by_date[next_maintenance_date] |= mtn_plan
+        for next_maintenance_date, plans in plans_by_date.items():
+            plans.write({
+                'next_maintenance_date': next_maintenance_date,
+                'start_maintenance_date': next_maintenance_date,
+            })
+        return requests
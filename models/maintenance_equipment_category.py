@@ -0,0 +1,16 @@
+from odoo import fields, models
+
+
+class MaintenanceEquipmentCategory(models.Model):
+    _inherit = 'maintenance.equipment.category'
+
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string="Cuenta analítica",
+        ondelete='set null',
+        help="Cuenta analítica de los registros de tiempo de las solicitudes de esta categoría."
+    )
+    failure_count = fields.Integer(string="Fallas", readonly=True, copy=False)
+    mtbf_hours = fields.Float(string="MTBF (horas)", readonly=True, copy=False)
+    mttr_hours = fields.Float(string="MTTR (horas)", readonly=True, copy=False)
+    availability = fields.Float(string="Disponibilidad (%)", readonly=True, copy=False)
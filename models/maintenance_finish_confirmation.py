@@ -1,5 +1,7 @@
-from odoo import models, fields
+from odoo import _, models, fields
 from odoo.exceptions import ValidationError
+from .maintenance_perf_metric import instrumented
+from .maintenance_stage import STAGE_ROLE_CANCELLED, STAGE_ROLE_DONE
 
 
 class MaintenanceRequestFinishConfirmation(models.TransientModel):
@@ -12,47 +14,91 @@ class MaintenanceRequestFinishConfirmation(models.TransientModel):
         help="Si está marcado, al confirmar se generará la próxima solicitud preventiva asociada al plan."
     )
 
+    def _get_maintenance_requests(self):
+        """Solicitudes en revisión: la selección completa o, en su defecto, la solicitud activa."""
+        request_ids = self.env.context.get('active_ids') or [self.env.context.get('active_id')]
+        return self.env['maintenance.request'].browse([request_id for request_id in request_ids if request_id])
+
+    def _split_requests_to_close(self, requests, stage, under_review=True):
+        """Separar las solicitudes que pueden pasar a ``stage`` de las omitidas.
+
+        Con ``under_review`` (finalizar) solo se aceptan las solicitudes en
+        revisión. Devuelve ``(permitidas, {id: motivo})``.
+        """
+        rejected = {}
+        if under_review:
+            rejected = {
+                request.id: _("La solicitud no está en revisión.")
+                for request in requests if not request.is_revision
+            }
+            requests = requests.filtered('is_revision')
+        allowed, stage_rejected = requests.with_context(
+            allow_stage_change=True
+        )._split_stage_transition(stage)
+        rejected.update(stage_rejected)
+        return allowed, rejected
+
+    def _close_requests(self, requests, stage, vals, create_next_request, under_review=True):
+        """Cerrar las solicitudes con una escritura y crear en lote las solicitudes siguientes.
+
+        Las solicitudes que no pueden pasar a ``stage`` se omiten y se informan
+        con una notificación.
+        """
+        allowed, rejected = self._split_requests_to_close(requests, stage, under_review)
+        next_request_items = [
+            (request.equipment_id, request.maintenance_plan_id, request.schedule_date)
+            for request in allowed if request.maintenance_plan_id
+        ]
+        if allowed:
+            allowed.with_context(allow_stage_change=True).write(dict(vals, stage_id=stage.id))
+        if create_next_request and next_request_items:
+            self.env['maintenance.equipment']._create_next_requests(next_request_items)
+        if not rejected:
+            return {'type': 'ir.actions.act_window_close'}
+        message = _("%s solicitudes movidas a '%s'.") % (len(allowed), stage.name)
+        message += "\n" + _("%s solicitudes omitidas: %s") % (len(rejected), "; ".join(
+            "%s (%s)" % (requests.browse(request_id).display_name, reason)
+            for request_id, reason in rejected.items()
+        ))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Cambio de etapa"),
+                'message': message,
+                'type': 'warning',
+                'sticky': True,
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    @instrumented
     def action_confirm_finish(self):
-        maintenance_request = self.env['maintenance.request'].browse(self.env.context.get('active_id'))
-        equipment = self.env['maintenance.equipment'].browse(self.env.context.get('equipment_id'))
-        maintenance_plan = self.env['maintenance.plan'].browse(self.env.context.get('maintenance_plan_id'))
-        if maintenance_request:
-            stage_finished = self.env.ref('maintenance.stage_3', raise_if_not_found=False)
-            if not stage_finished:
-                stage_finished = self.env["maintenance.stage"].search(
-                    ['|', '|', ('name', '=', 'Finalizado'), ('name', '=', 'Done'), ('name', '=', 'Reparado')],
-                    limit=1
-                )
+        maintenance_requests = self._get_maintenance_requests()
+        if maintenance_requests:
+            stage_finished = self.env['maintenance.stage']._get_stage_for_role(STAGE_ROLE_DONE)
             if not stage_finished:
                 raise ValidationError("No se encontró la etapa 'Finalizado/Reparado/Done'. Revise la configuración de etapas.")
 
-            current_request_date = maintenance_request.schedule_date
-            maintenance_request.stage_id = stage_finished.id
-            maintenance_request.check_date_time = fields.Datetime.now()
-
-            if maintenance_plan:
-                equipment._create_next_request(maintenance_plan, current_request_date)
+            return self._close_requests(
+                maintenance_requests, stage_finished, {'check_date_time': fields.Datetime.now()}, True
+            )
         return {'type': 'ir.actions.act_window_close'}
 
+    @instrumented
     def action_confirm_cancelled(self):
-        maintenance_request = self.env['maintenance.request'].browse(self.env.context.get('active_id'))
-        equipment = self.env['maintenance.equipment'].browse(self.env.context.get('equipment_id'))
-        maintenance_plan = self.env['maintenance.plan'].browse(self.env.context.get('maintenance_plan_id'))
-        if maintenance_request:
-            maintenance_request._ensure_not_final_stage_for_cancel()
-            stage_cancelled = self.env.ref('maintenance.stage_4', raise_if_not_found=False)
-            if not stage_cancelled:
-                stage_cancelled = self.env["maintenance.stage"].search(
-                    ['|', '|', ('name', '=', 'Cancelado'), ('name', '=', 'Cancelled'), ('name', '=', 'Desechar')],
-                    limit=1
-                )
+        maintenance_requests = self._get_maintenance_requests()
+        if maintenance_requests:
+            maintenance_requests._ensure_not_final_stage_for_cancel()
+            stage_cancelled = self.env['maintenance.stage']._get_stage_for_role(STAGE_ROLE_CANCELLED)
             if not stage_cancelled:
                 raise ValidationError("No se encontró la etapa 'Cancelado/Desechar/Cancelled'. Revise la configuración de etapas.")
 
-            current_request_date = maintenance_request.schedule_date
-            maintenance_request.stage_id = stage_cancelled.id
-            maintenance_request.cancellation_date_time = fields.Datetime.now()
-
-            if maintenance_plan and self.create_next_request:
-                equipment._create_next_request(maintenance_plan, current_request_date)
+            return self._close_requests(
+                maintenance_requests,
+                stage_cancelled,
+                {'cancellation_date_time': fields.Datetime.now()},
+                self.create_next_request,
+                under_review=False,
+            )
         return {'type': 'ir.actions.act_window_close'}
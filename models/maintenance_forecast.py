@@ -0,0 +1,56 @@
+from dateutil.relativedelta import relativedelta
+from odoo import api, fields, models, _
+from odoo.tools import split_every
+
+FORECAST_HORIZON_MONTHS = 12
+FORECAST_CREATE_BATCH_SIZE = 1000
+
+
+class MaintenanceForecast(models.TransientModel):
+    _name = 'maintenance.forecast'
+    _description = 'Previsión de mantenimiento preventivo'
+    _order = 'date, id'
+
+    maintenance_plan_id = fields.Many2one('maintenance.plan', string='Plan de mantenimiento', readonly=True)
+    equipment_id = fields.Many2one('maintenance.equipment', string='Equipo', readonly=True)
+    category_id = fields.Many2one('maintenance.equipment.category', string='Categoría', readonly=True)
+    maintenance_team_id = fields.Many2one('maintenance.team', string='Equipo de mantenimiento', readonly=True)
+    user_id = fields.Many2one('res.users', string='Técnico', readonly=True)
+    name = fields.Char(string='Descripción', readonly=True)
+    date = fields.Date(string='Fecha prevista', readonly=True)
+    estimated_hours = fields.Float(string='Horas estimadas', readonly=True)
+
+    @api.model
+    def action_open_forecast(self, horizon_months=FORECAST_HORIZON_MONTHS):
+        """Proyectar las ocurrencias de todos los planes sin crear solicitudes y abrir la previsión."""
+        self.search([('create_uid', '=', self.env.uid)]).unlink()
+        today = fields.Date.today()
+        horizon_date = today + relativedelta(months=horizon_months)
+        plans = self.env['maintenance.plan'].search([('equipment_id', '!=', False), ('interval', '>', 0)])
+        dates_by_plan = plans._get_forecast_dates(today, horizon_date)
+        hours_by_plan = plans._get_estimated_hours()
+
+        vals_list = []
+        for plan in plans:
+            equipment = plan.equipment_id
+            name = f"{equipment.name or 'Equipo'} ({equipment._get_frequency_name(plan.interval, plan.interval_step)})"
+            for forecast_date in dates_by_plan.get(plan.id, ()):
+                vals_list.append({
+                    'maintenance_plan_id': plan.id,
+                    'equipment_id': equipment.id,
+                    'category_id': equipment.category_id.id,
+                    'maintenance_team_id': plan.maintenance_team_id.id,
+                    'user_id': equipment.technician_user_id.id,
+                    'name': name,
+                    'date': forecast_date,
+                    'estimated_hours': hours_by_plan.get(plan.id, 0.0),
+                })
+        for batch in split_every(FORECAST_CREATE_BATCH_SIZE, vals_list, list):
+            self.create(batch)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Previsión de mantenimiento"),
+            'res_model': self._name,
+            'view_mode': 'calendar,pivot,tree',
+            'target': 'current',
+        }
@@ -1,4 +1,5 @@
 from odoo import models, fields
+from .maintenance_perf_metric import instrumented
 
 
 class MaintenancePauseWizard(models.TransientModel):
@@ -7,8 +8,11 @@ class MaintenancePauseWizard(models.TransientModel):
 
     maintenance_request_id = fields.Many2one(
         'maintenance.request',
-        string='Solicitud de mantenimiento',
-        required=True
+        string='Solicitud de mantenimiento'
+    )
+    maintenance_request_ids = fields.Many2many(
+        'maintenance.request',
+        string='Solicitudes de mantenimiento'
     )
     pause_cause_id = fields.Many2one(
         'maintenance.pause.cause',
@@ -16,19 +20,12 @@ class MaintenancePauseWizard(models.TransientModel):
         required=True
     )
 
+    @instrumented
     def action_confirm_pause(self):
         self.ensure_one()
-        request = self.maintenance_request_id
-        if not request:
+        requests = self.maintenance_request_ids | self.maintenance_request_id
+        if not requests:
             return {'type': 'ir.actions.act_window_close'}
 
-        request._close_open_time_records()
-        self.env['maintenance.time_records'].create({
-            'maintenance_request_id': request.id,
-            'time_type': 'pause',
-            'pause_cause_id': self.pause_cause_id.id,
-            'start_datetime': fields.Datetime.now(),
-            'name': f"Pausa - {request.name or request.code or ''}",
-        })
-        request.time_state = 'pause'
+        requests._pause_time(self.pause_cause_id)
         return {'type': 'ir.actions.act_window_close'}
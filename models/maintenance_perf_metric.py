@@ -0,0 +1,139 @@
+from datetime import timedelta
+from odoo import SUPERUSER_ID, api, fields, models
+from odoo.tools import str2bool
+import functools
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Parámetro del sistema que activa la instrumentación. Su lectura pasa por la
+# caché de ``ir.config_parameter``, así que desactivada no cuesta consultas.
+PERF_PARAM = 'maintenance_time_records.perf_instrumentation'
+# Segundos entre volcados de las muestras de cada proceso a la base de datos
+PERF_FLUSH_INTERVAL = 300
+PERF_RETENTION_DAYS = 90
+
+# (base de datos, método) -> [llamadas, consultas, segundos, máximo de segundos]
+_perf_samples = {}
+_perf_last_flush = {}
+_perf_lock = threading.Lock()
+
+
+def _is_perf_enabled(env):
+    return str2bool(env['ir.config_parameter'].sudo().get_param(PERF_PARAM, 'False'), False)
+
+
+def _record_perf_sample(dbname, method_name, queries, seconds):
+    """Acumular una muestra y devolver si toca volcar las del proceso."""
+    now = time.monotonic()
+    with _perf_lock:
+        sample = _perf_samples.setdefault((dbname, method_name), [0, 0, 0.0, 0.0])
+        sample[0] += 1
+        sample[1] += queries
+        sample[2] += seconds
+        sample[3] = max(sample[3], seconds)
+        last_flush = _perf_last_flush.setdefault(dbname, now)
+        if now - last_flush < PERF_FLUSH_INTERVAL:
+            return False
+        _perf_last_flush[dbname] = now
+        return True
+
+
+def _pop_perf_samples(dbname):
+    with _perf_lock:
+        _perf_last_flush[dbname] = time.monotonic()
+        keys = [key for key in _perf_samples if key[0] == dbname]
+        return {key[1]: _perf_samples.pop(key) for key in keys}
+
+
+def instrumented(method):
+    """Medir llamadas, consultas SQL y duración de un método si la instrumentación está activa."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not _is_perf_enabled(self.env):
+            return method(self, *args, **kwargs)
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            flush_due = _record_perf_sample(
+                cr.dbname,
+                f'{self._name}.{method.__name__}',
+                cr.sql_log_count - queries_before,
+                time.perf_counter() - started,
+            )
+            if flush_due:
+                # Cursor propio: el volcado no depende de la transacción medida
+                with self.env.registry.cursor() as flush_cr:
+                    env = api.Environment(flush_cr, SUPERUSER_ID, {})
+                    env['maintenance.perf.metric']._flush_samples()
+    return wrapper
+
+
+class MaintenancePerfMetric(models.Model):
+    _name = 'maintenance.perf.metric'
+    _description = 'Métrica de rendimiento de mantenimiento'
+    _order = 'period desc, name'
+
+    name = fields.Char(string='Método', required=True, readonly=True, index=True)
+    period = fields.Datetime(string='Periodo', required=True, readonly=True, index=True)
+    call_count = fields.Integer(string='Llamadas', readonly=True)
+    query_count = fields.Integer(string='Consultas SQL', readonly=True)
+    duration_total = fields.Float(string='Duración total (s)', readonly=True, digits=(16, 3))
+    duration_max = fields.Float(string='Duración máxima (s)', readonly=True, digits=(16, 3), group_operator='max')
+
+    _sql_constraints = [
+        ('name_period_unique', 'unique(name, period)', 'Ya existe una métrica para este método y periodo.'),
+    ]
+
+    @api.model
+    def _flush_samples(self):
+        """Volcar las muestras en memoria del proceso en la hora actual."""
+        samples = _pop_perf_samples(self.env.cr.dbname)
+        if not samples:
+            return 0
+        period = fields.Datetime.now().replace(minute=0, second=0, microsecond=0)
+        names = list(samples)
+        self.env.cr.execute(
+            """
+            INSERT INTO maintenance_perf_metric (
+                name, period, call_count, query_count, duration_total, duration_max,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT name, %(period)s, calls, queries, seconds, max_seconds,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(names)s::varchar[], %(calls)s::int[], %(queries)s::int[],
+                          %(seconds)s::float[], %(max_seconds)s::float[])
+                   AS sample(name, calls, queries, seconds, max_seconds)
+            ON CONFLICT (name, period) DO UPDATE SET
+                call_count = maintenance_perf_metric.call_count + EXCLUDED.call_count,
+                query_count = maintenance_perf_metric.query_count + EXCLUDED.query_count,
+                duration_total = maintenance_perf_metric.duration_total + EXCLUDED.duration_total,
+                duration_max = GREATEST(maintenance_perf_metric.duration_max, EXCLUDED.duration_max),
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            """,
+            {
+                'period': period,
+                'uid': self.env.uid,
+                'names': names,
+                'calls': [samples[name][0] for name in names],
+                'queries': [samples[name][1] for name in names],
+                'seconds': [samples[name][2] for name in names],
+                'max_seconds': [samples[name][3] for name in names],
+            },
+        )
+        self.invalidate_model()
+        return len(names)
+
+    @api.model
+    def _cron_flush_samples(self):
+        """Volcar las muestras pendientes y purgar las métricas antiguas."""
+        flushed = self._flush_samples()
+        limit = fields.Datetime.now() - timedelta(days=PERF_RETENTION_DAYS)
+        self.env.cr.execute("DELETE FROM maintenance_perf_metric WHERE period < %s", (limit,))
+        _logger.info("Métricas de rendimiento: %s métodos volcados, %s filas purgadas", flushed, self.env.cr.rowcount)
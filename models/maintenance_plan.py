@@ -1,9 +1,65 @@
+from collections import defaultdict
 from odoo import models, fields, api
+from odoo.tools import split_every
+from .maintenance_perf_metric import instrumented
 import logging
 import ast
+import numpy as np
+import threading
 
 _logger = logging.getLogger(__name__)
 
+REQUEST_GENERATION_CHUNK_SIZE = 200
+REQUEST_CREATE_BATCH_SIZE = 500
+REQUEST_GENERATION_CURSOR_PARAM = 'maintenance_time_records.request_generation_last_plan_id'
+
+# (base de datos, plan) -> (clave de validez, fechas previstas). La clave incluye
+# el write_date del plan, así que cualquier cambio del plan invalida su entrada.
+_forecast_cache = {}
+_forecast_cache_lock = threading.Lock()
+
+
+def _project_occurrences(first_dates, intervals, steps, horizon_date):
+    """Proyectar las ocurrencias de varios planes con aritmética vectorizada de fechas.
+
+    Reproduce la suma sucesiva de ``relativedelta`` que usa la generación de
+    solicitudes: en pasos mensuales el día del mes se recorta al largo de cada
+    mes y ese recorte se arrastra a las ocurrencias siguientes. Devuelve, por
+    plan, la lista de fechas hasta ``horizon_date`` inclusive.
+    """
+    first = np.array(first_dates, dtype='datetime64[D]')
+    intervals = np.array(intervals, dtype='int64')
+    steps = np.array(steps)
+    horizon = np.datetime64(horizon_date, 'D')
+    result = [[] for __ in range(len(first))]
+
+    day_mask = np.isin(steps, ('day', 'week'))
+    if day_mask.any():
+        days = intervals[day_mask] * np.where(steps[day_mask] == 'week', 7, 1)
+        span = int(((horizon - first[day_mask]).astype('int64') // days).max(initial=-1)) + 1
+        if span > 0:
+            offsets = np.arange(span, dtype='int64')
+            occurrences = first[day_mask][:, None] + (days[:, None] * offsets[None, :]).astype('timedelta64[D]')
+            for index, row in zip(np.flatnonzero(day_mask), occurrences):
+                result[index] = row[row <= horizon].astype(object).tolist()
+
+    month_mask = ~day_mask
+    if month_mask.any():
+        months = intervals[month_mask] * np.where(steps[month_mask] == 'year', 12, 1)
+        first_month = first[month_mask].astype('datetime64[M]')
+        first_day = (first[month_mask] - first_month.astype('datetime64[D]')).astype('int64')
+        horizon_month = horizon.astype('datetime64[M]')
+        span = int(((horizon_month - first_month).astype('int64') // months).max(initial=-1)) + 1
+        if span > 0:
+            offsets = np.arange(span, dtype='int64')
+            month = first_month[:, None] + (months[:, None] * offsets[None, :]).astype('timedelta64[M]')
+            month_start = month.astype('datetime64[D]')
+            month_length = ((month + 1).astype('datetime64[D]') - month_start).astype('int64')
+            day = np.minimum.accumulate(np.minimum(first_day[:, None], month_length - 1), axis=1)
+            occurrences = month_start + day.astype('timedelta64[D]')
+            for index, row in zip(np.flatnonzero(month_mask), occurrences):
+                result[index] = row[row <= horizon].astype(object).tolist()
+    return result
 
 class MaintenancePlan(models.Model):
     _inherit = 'maintenance.plan'
@@ -11,24 +67,131 @@ class MaintenancePlan(models.Model):
     note = fields.Text(string="Instrucciones")
     code = fields.Char(string='Código', readonly=True, copy=False, default='/')
     instruction_pdf = fields.Binary(string="Instructivo PDF", help="Cargar el PDF del instructivo de mantenimiento.")
+    analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string="Cuenta analítica",
+        ondelete='set null',
+        help="Cuenta analítica de los registros de tiempo de las solicitudes de este plan."
+    )
 
-    @api.model
-    def create(self, vals):
-        if vals.get('code', '/') == '/':
-            vals['code'] = self.env['ir.sequence'].next_by_code('maintenance.plan.default') or '/'
-        return super(MaintenancePlan, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        pending_code = [vals for vals in vals_list if vals.get('code', '/') == '/']
+        codes = self.env['ir.sequence']._next_block_by_code('maintenance.plan.default', len(pending_code))
+        for vals, code in zip(pending_code, codes):
+            vals['code'] = code or '/'
+        return super(MaintenancePlan, self).create(vals_list)
 
+    @instrumented
     def button_manual_request_generation(self):
         messages = []
+        plans_with_equipment = self.filtered('equipment_id')
+        plans_with_equipment._generate_requests_to_horizon()
         for plan in self:
             if plan.equipment_id:
-                equipment = plan.equipment_id
-                equipment._create_new_request(plan)
-                messages.append(f"Solicitud manual generada para el plan de mantenimiento ID: {plan.id} con equipo ID: {equipment.id}.")
+                messages.append(f"Solicitud manual generada para el plan de mantenimiento ID: {plan.id} con equipo ID: {plan.equipment_id.id}.")
             else:
                 messages.append(f"No se pudo generar solicitud manual para el plan ID {plan.id} porque no tiene equipo asociado.")
         return messages
 
+    def _get_furthest_request_dates(self):
+        """Devolver la fecha de la solicitud más lejana de cada plan con una consulta agrupada."""
+        if not self:
+            return {}
+        self.env['maintenance.request'].flush_model(['maintenance_plan_id', 'request_date'])
+        self.flush_recordset(['start_maintenance_date'])
+        self.env.cr.execute(
+            """
+            SELECT r.maintenance_plan_id, MAX(r.request_date)
+              FROM maintenance_request r
+              JOIN maintenance_plan p ON p.id = r.maintenance_plan_id
+             WHERE r.maintenance_plan_id = ANY(%s)
+               AND r.request_date >= p.start_maintenance_date
+          GROUP BY r.maintenance_plan_id
+            """,
+            (self.ids,),
+        )
+        return dict(self.env.cr.fetchall())
+
+    def _get_pending_occurrence_dates(self, furthest_date, today, horizon_date):
+        """Fechas de las ocurrencias del plan entre hoy y el horizonte que aún no tienen solicitud."""
+        self.ensure_one()
+        if not self.interval or self.interval <= 0:
+            return []
+        step = self.get_relativedelta(self.interval, self.interval_step or "year")
+        next_date = furthest_date + step if furthest_date else self.next_maintenance_date
+        dates = []
+        while next_date and next_date <= horizon_date:
+            if next_date >= today:
+                dates.append(next_date)
+            next_date = next_date + step
+        return dates
+
+    @instrumented
+    def _generate_requests_to_horizon(self):
+        """Generar en una pasada las solicitudes que faltan hasta el horizonte de cada plan."""
+        today = fields.Date.today()
+        furthest_dates = self._get_furthest_request_dates()
+        vals_by_skip_notify = defaultdict(list)
+        for plan in self:
+            horizon_date = today + plan.get_relativedelta(
+                plan.maintenance_plan_horizon, plan.planning_step or "year"
+            )
+            dates = plan._get_pending_occurrence_dates(furthest_dates.get(plan.id), today, horizon_date)
+            if not dates:
+                continue
+            equipment = plan.equipment_id
+            frequency_name = equipment._get_frequency_name(plan.interval, plan.interval_step)
+            request_name = f"{equipment.name or 'Equipo'} ({frequency_name})"
+            for next_maintenance_date in dates:
+                vals = equipment._prepare_requests_from_plan(plan, next_maintenance_date)
+                vals.update({
+                    'maintenance_plan_id': plan.id,
+                    'name': request_name
+                })
+                vals_by_skip_notify[plan.skip_notify_follower_on_requests].append(vals)
+
+        requests = self.env['maintenance.request']
+        for skip_notify_follower, vals_list in vals_by_skip_notify.items():
+            request_model = requests.with_context(
+                mail_activity_quick_update=skip_notify_follower,
+                mail_auto_subscribe_no_notify=skip_notify_follower,
+            )
+            for batch in split_every(REQUEST_CREATE_BATCH_SIZE, vals_list):
+                requests |= request_model.create(list(batch))
+        return requests
+
+    @api.model
+    @instrumented
+    def _cron_generate_requests_to_horizon(self, chunk_size=REQUEST_GENERATION_CHUNK_SIZE):
+        """Generar las solicitudes de todos los planes por lotes, confirmando cada lote.
+
+        El último plan procesado se guarda en un parámetro del sistema, de modo
+        que una ejecución interrumpida continúa donde quedó.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        params = self.env['ir.config_parameter'].sudo()
+        last_plan_id = int(params.get_param(REQUEST_GENERATION_CURSOR_PARAM, 0))
+        while True:
+            plans = self.search(
+                [('id', '>', last_plan_id), ('equipment_id', '!=', False), ('interval', '>', 0)],
+                order='id', limit=chunk_size,
+            )
+            if not plans:
+                break
+            requests = plans._generate_requests_to_horizon()
+            last_plan_id = plans[-1].id
+            params.set_param(REQUEST_GENERATION_CURSOR_PARAM, last_plan_id)
+            _logger.info(
+                "Generadas %s solicitudes para %s planes (último plan ID: %s).",
+                len(requests), len(plans), last_plan_id
+            )
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        params.set_param(REQUEST_GENERATION_CURSOR_PARAM, 0)
+        return True
+
     def action_view_requests(self):
         """Abrir solicitudes vinculadas usando la vista Kanban personalizada."""
         action = None
@@ -76,3 +239,59 @@ class MaintenancePlan(models.Model):
         })
         action_dict['context'] = context
         return action_dict
+
+    def _get_forecast_dates(self, today, horizon_date):
+        """Fechas previstas de cada plan entre hoy y el horizonte, a partir de su última solicitud.
+
+        Solo se proyectan los planes cuya entrada en caché dejó de ser válida,
+        todos juntos en una sola pasada vectorizada.
+        """
+        furthest_dates = self._get_furthest_request_dates()
+        dbname = self.env.cr.dbname
+        dates_by_plan = {}
+        to_project = []
+        for plan in self:
+            cache_key = (plan.write_date, furthest_dates.get(plan.id), today, horizon_date)
+            cached = _forecast_cache.get((dbname, plan.id))
+            if cached and cached[0] == cache_key:
+                dates_by_plan[plan.id] = cached[1]
+                continue
+            furthest_date = furthest_dates.get(plan.id)
+            step = plan.get_relativedelta(plan.interval, plan.interval_step or "year")
+            first_date = furthest_date + step if furthest_date else plan.next_maintenance_date
+            if not first_date:
+                dates_by_plan[plan.id] = []
+                continue
+            to_project.append((plan, cache_key, first_date))
+
+        if to_project:
+            projected = _project_occurrences(
+                [first_date for __, __, first_date in to_project],
+                [plan.interval for plan, __, __ in to_project],
+                [plan.interval_step or 'year' for plan, __, __ in to_project],
+                horizon_date,
+            )
+            with _forecast_cache_lock:
+                for (plan, cache_key, __), dates in zip(to_project, projected):
+                    dates = [forecast_date for forecast_date in dates if forecast_date >= today]
+                    _forecast_cache[(dbname, plan.id)] = (cache_key, dates)
+                    dates_by_plan[plan.id] = dates
+        return dates_by_plan
+
+    def _get_estimated_hours(self):
+        """Horas activas medias de las solicitudes ya trabajadas de cada plan; si no hay, la duración del plan."""
+        if not self:
+            return {}
+        self.env['maintenance.request'].flush_model(['maintenance_plan_id', 'active_duration_closed_seconds'])
+        self.env.cr.execute(
+            """
+            SELECT maintenance_plan_id, AVG(active_duration_closed_seconds) / 3600.0
+              FROM maintenance_request
+             WHERE maintenance_plan_id = ANY(%s)
+               AND active_duration_closed_seconds > 0
+          GROUP BY maintenance_plan_id
+            """,
+            (self.ids,),
+        )
+        averages = dict(self.env.cr.fetchall())
+        return {plan.id: round(averages.get(plan.id) or plan.duration or 0.0, 2) for plan in self}
@@ -1,10 +1,24 @@
 from datetime import date, datetime, timedelta
-from odoo import _, api, fields, models
-from odoo.exceptions import ValidationError
+from odoo import _, api, fields, models, tools
+from odoo.tools import split_every
+from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+from .maintenance_perf_metric import instrumented
+from .maintenance_time_records import DEFER_ACTIVE_DURATION_CONTEXT
+from .maintenance_stage import (
+    STAGE_ROLE_CANCELLED,
+    STAGE_ROLE_DONE,
+    STAGE_ROLE_IN_PROGRESS,
+    STAGE_ROLE_NEW,
+    STAGE_ROLE_REVISION,
+)
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+RENAME_CHUNK_SIZE = 500
+
 
 class MaintenanceRequest(models.Model):
     _inherit = 'maintenance.request'
@@ -26,18 +40,20 @@ class MaintenanceRequest(models.Model):
         store=True
     )
     instruction_pdf = fields.Binary(related='maintenance_plan_id.instruction_pdf', readonly=True)
+    instruction_pdf_url = fields.Char(
+        string="Instructivo",
+        compute='_compute_instruction_pdf_url'
+    )
     note = fields.Text(string="Instrucciones", related='maintenance_plan_id.note')
     description = fields.Text(string="Notas")
     is_previous_month = fields.Boolean(
         compute='_compute_is_previous_month_and_current',
-        store=True,
-        default=False,
+        search='_search_is_previous_month',
         string="Es del mes anterior"
     )
     is_current_month = fields.Boolean(
         compute='_compute_is_previous_month_and_current',
-        store=True,
-        default=False,
+        search='_search_is_current_month',
         string="Es del mes actual"
     )
     stage_id = fields.Many2one(
@@ -68,12 +84,24 @@ class MaintenanceRequest(models.Model):
             ('done', 'Done')
         ],
         string='Timer State',
-        default='idle'
+        compute='_compute_time_state',
+        search='_search_time_state'
+    )
+    time_finished = fields.Boolean(
+        string='Cronómetro finalizado',
+        readonly=True,
+        copy=False,
+        help="Se marca al finalizar el tiempo; sin tramos abiertos, el cronómetro queda en 'Done'."
+    )
+    active_duration_closed_seconds = fields.Float(
+        string='Tiempo activo cerrado (segundos)',
+        readonly=True,
+        copy=False
     )
     total_active_duration_hours = fields.Float(
         string='Tiempo activo (horas)',
         compute='_compute_total_active_duration',
-        store=True
+        store=False
     )
     total_active_duration_display = fields.Char(
         string='Tiempo activo',
@@ -86,53 +114,134 @@ class MaintenanceRequest(models.Model):
         store=False
     )
 
+    def init(self):
+        super().init()
+        # Soporta los filtros de mes anterior/actual, que se resuelven por rango de fechas y etapa
+        tools.create_index(
+            self._cr, 'maintenance_request_schedule_date_stage_id_index',
+            self._table, ['schedule_date', 'stage_id']
+        )
+
+    @api.depends('maintenance_plan_id.instruction_pdf')
+    def _compute_instruction_pdf_url(self):
+        checksums = self.env['ir.attachment']._get_field_checksums(
+            'maintenance.plan', 'instruction_pdf', self.maintenance_plan_id.ids
+        )
+        for request in self:
+            checksum = checksums.get(request.maintenance_plan_id.id)
+            request.instruction_pdf_url = checksum and (
+                f"/maintenance_time_records/document/maintenance.request/{request._origin.id}/instruction_pdf?unique={checksum}"
+            )
+
     @api.depends('stage_id')
     def _compute_is_revision(self):
+        revision_ids = self.env['maintenance.stage']._get_stage_ids(STAGE_ROLE_REVISION)
         for record in self:
-            record.is_revision = record.stage_id.name == 'Revisión'
+            record.is_revision = record.stage_id.id in revision_ids
 
     @api.depends('stage_id')
     def _compute_is_finish(self):
-        restricted_stages = ['Finalizado', 'Cancelado']
+        restricted_ids = self.env['maintenance.stage']._get_restricted_stage_ids()
         for record in self:
-            record.is_finish = record.stage_id.name in restricted_stages
+            record.is_finish = record.stage_id.id in restricted_ids
 
     @api.depends('stage_id')
     def _compute_is_stage_repair_or_scrap(self):
-        stage_repaired = self.env.ref('maintenance.stage_3', raise_if_not_found=False)
-        stage_scrap = self.env.ref('maintenance.stage_4', raise_if_not_found=False)
-        target_ids = {s.id for s in (stage_repaired, stage_scrap) if s}
+        target_ids = self._get_repair_or_scrap_stage_ids()
         for record in self:
             record.is_stage_repair_or_scrap = record.stage_id.id in target_ids
 
     @api.model
-    def create(self, vals):
-        if vals.get('code', '/') == '/':
-            vals['code'] = self.env['ir.sequence'].next_by_code('maintenance.request.default') or '/'
-        vals.setdefault('issue_date', fields.Datetime.now())
-        return super(MaintenanceRequest, self).create(vals)
+    def _get_repair_or_scrap_stage_ids(self):
+        stages = self.env['maintenance.stage']
+        return stages._get_stage_ids(STAGE_ROLE_DONE, STAGE_ROLE_CANCELLED) - stages._get_restricted_stage_ids()
+
+    @api.model_create_multi
+    @instrumented
+    def create(self, vals_list):
+        pending_code = [vals for vals in vals_list if vals.get('code', '/') == '/']
+        codes = self.env['ir.sequence']._next_block_by_code('maintenance.request.default', len(pending_code))
+        for vals, code in zip(pending_code, codes):
+            vals['code'] = code or '/'
+        now = fields.Datetime.now()
+        for vals in vals_list:
+            vals.setdefault('issue_date', now)
+        return super(MaintenanceRequest, self).create(vals_list)
 
     @api.constrains("stage_id")
     def _check_stage_permissions(self):
-        done = 'Finalizado'
-        cancelled = 'Cancelado'
-        stage_done = self.env['maintenance.stage'].search([('name', '=', done)], limit=1)
-        stage_cancelled = self.env['maintenance.stage'].search([('name', '=', cancelled)], limit=1)
-        for request in self:
-            if request.stage_id in (stage_done, stage_cancelled):
-                if not self.env.user.has_group('maintenance_time_records.group_maintenance_technical_admin'):
-                    raise ValidationError(_("No tiene los permisos necesarios para esta acción."))
+        restricted_ids = self.env['maintenance.stage']._get_restricted_stage_ids()
+        if any(request.stage_id.id in restricted_ids for request in self):
+            if not self.env.user.has_group('maintenance_time_records.group_maintenance_technical_admin'):
+                raise ValidationError(_("No tiene los permisos necesarios para esta acción."))
+
+    def update_existing_request_names(self, dry_run=False, chunk_size=RENAME_CHUNK_SIZE):
+        """Renombrar las solicitudes según su equipo y la frecuencia de su plan.
+
+        El nombre se calcula una vez por (plan, equipo) y se aplica con UPDATE
+        agrupados por lotes, omitiendo las filas que ya son correctas. Con
+        ``dry_run`` solo se cuentan las solicitudes que cambiarían.
+        """
+        auto_commit = not dry_run and not getattr(threading.current_thread(), 'testing', False)
+        self.flush_model(['name', 'maintenance_plan_id', 'equipment_id'])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT maintenance_plan_id, equipment_id
+              FROM maintenance_request
+             WHERE name IS NOT NULL
+               AND maintenance_plan_id IS NOT NULL
+               AND equipment_id IS NOT NULL
+          ORDER BY maintenance_plan_id, equipment_id
+            """
+        )
+        groups = self.env.cr.fetchall()
+        plans = self.env['maintenance.plan'].browse({plan_id for plan_id, __ in groups})
+        equipments = self.env['maintenance.equipment'].browse({equipment_id for __, equipment_id in groups})
 
-    def update_existing_request_names(self):
-        requests = self.search([("name", "!=", False)])
         count = 0
-        for request in requests:
-            plan = request.maintenance_plan_id
-            equipment = request.equipment_id
-            if plan and equipment:
+        processed = 0
+        for chunk in split_every(chunk_size, groups):
+            plan_ids, equipment_ids, names = [], [], []
+            for plan_id, equipment_id in chunk:
+                plan = plans.browse(plan_id)
+                equipment = equipments.browse(equipment_id)
                 frequency_name = equipment._get_frequency_name(plan.interval, plan.interval_step)
-                request.name = f"{equipment.name} ({frequency_name})"
-                count += 1
+                plan_ids.append(plan_id)
+                equipment_ids.append(equipment_id)
+                names.append(f"{equipment.name} ({frequency_name})")
+            if dry_run:
+                query = """
+                    SELECT COUNT(*)
+                      FROM maintenance_request r
+                      JOIN unnest(%s::int[], %s::int[], %s::text[]) AS t(plan_id, equipment_id, name)
+                        ON r.maintenance_plan_id = t.plan_id AND r.equipment_id = t.equipment_id
+                     WHERE r.name IS DISTINCT FROM t.name
+                """
+                self.env.cr.execute(query, (plan_ids, equipment_ids, names))
+                count += self.env.cr.fetchone()[0]
+            else:
+                query = """
+                    UPDATE maintenance_request r
+                       SET name = t.name,
+                           write_uid = %s,
+                           write_date = (now() AT TIME ZONE 'UTC')
+                      FROM unnest(%s::int[], %s::int[], %s::text[]) AS t(plan_id, equipment_id, name)
+                     WHERE r.maintenance_plan_id = t.plan_id
+                       AND r.equipment_id = t.equipment_id
+                       AND r.name IS DISTINCT FROM t.name
+                """
+                self.env.cr.execute(query, (self.env.uid, plan_ids, equipment_ids, names))
+                count += self.env.cr.rowcount
+            processed += len(chunk)
+            logger.info(
+                "Renombrado de solicitudes: %s/%s grupos (plan, equipo) procesados, %s solicitudes %s.",
+                processed, len(groups), count, "por actualizar" if dry_run else "actualizadas"
+            )
+            if auto_commit:
+                self.env.cr.commit()
+        self.invalidate_model(['name', 'write_uid', 'write_date'])
+        if dry_run:
+            return f"{count} registros de mantenimiento por actualizar."
         return f"{count} registros de mantenimiento actualizados."
 
     def button_open_view_finish_custom(self):
@@ -143,9 +252,9 @@ class MaintenanceRequest(models.Model):
             'view_id': self.env.ref('maintenance_time_records.view_maintenance_finish_confirmation_form').id,
             'target': 'new',
             'context': {
-                'active_id': self.id,
-                'equipment_id': self.equipment_id.id,
-                'maintenance_plan_id': self.maintenance_plan_id.id,
+                'active_id': self[:1].id,
+                'active_ids': self.ids,
+                'active_model': self._name,
                 'allow_stage_change': True,
             },
         }
@@ -159,70 +268,109 @@ class MaintenanceRequest(models.Model):
             'view_id': self.env.ref('maintenance_time_records.view_maintenance_cancelled_confirmation_form').id,
             'target': 'new',
             'context': {
-                'active_id': self.id,
-                'equipment_id': self.equipment_id.id,
-                'maintenance_plan_id': self.maintenance_plan_id.id,
+                'active_id': self[:1].id,
+                'active_ids': self.ids,
+                'active_model': self._name,
                 'allow_stage_change': True,
             },
         }
 
     def _ensure_not_final_stage_for_cancel(self):
-        final_stage_xmlids = ['maintenance.stage_3', 'maintenance.stage_4']
-        final_stage_ids = []
-        for xmlid in final_stage_xmlids:
-            stage = self.env.ref(xmlid, raise_if_not_found=False)
-            if stage:
-                final_stage_ids.append(stage.id)
+        final_stage_ids = self._get_repair_or_scrap_stage_ids()
         for request in self:
-            if final_stage_ids and request.stage_id.id in final_stage_ids:
+            if request.stage_id.id in final_stage_ids:
                 raise ValidationError(
                     _("No se puede cancelar una orden que ya está en una etapa final: '%s'.")
                     % request.stage_id.display_name
                 )
 
+    @instrumented
     def write(self, vals):
-        if 'schedule_date' in vals or 'stage_id' in vals:
-            self._compute_is_previous_month_and_current()
-
+        reaches_done = False
         if 'stage_id' in vals:
-            for request in self:
-                if request.is_finish:
-                    raise ValidationError(
-                        _("No se puede mover esta solicitud porque está en una etapa restringida: '%s'.")
-                        % request.stage_id.name
-                    )
-
-            stage_done = self.env.ref('maintenance.stage_3', raise_if_not_found=False)
-            stage_cancelled = self.env.ref('maintenance.stage_4', raise_if_not_found=False)
-            restricted_xmlids = {'maintenance.stage_3', 'maintenance.stage_4'}
-            new_stage = self.env['maintenance.stage'].browse(vals['stage_id'])
-            if not new_stage.exists():
-                raise ValidationError("La etapa especificada no existe.")
-
-            restricted_stage_ids = {stage.id for stage in (stage_done, stage_cancelled) if stage}
-            restricted_stage_names = ['Finalizado', 'Cancelado', 'Done', 'Cancelled', 'Reparado', 'Desechar']
-
-            is_restricted = (
-                new_stage.id in restricted_stage_ids
-                or new_stage.get_external_id().get(new_stage.id) in restricted_xmlids
-                or new_stage.name in restricted_stage_names
-            )
-
-            if is_restricted and not self.env.context.get('allow_stage_change'):
-                raise ValidationError(
-                    "No se puede mover esta solicitud al estado '%s' desde el tablero Kanban. "
-                    "Por favor, utilice el botón correspondiente." % new_stage.name
-                )
+            stage = self.env['maintenance.stage'].browse(vals['stage_id'])
+            __, rejected = self._split_stage_transition(stage)
+            if rejected:
+                raise ValidationError(next(iter(rejected.values())))
             self = self.sudo()
             self.activity_update()
-            stage_repaired = self.env.ref('maintenance.stage_3', raise_if_not_found=False)
-            stage_scrap = self.env.ref('maintenance.stage_4', raise_if_not_found=False)
-            if stage_repaired and new_stage.id == stage_repaired.id:
-                vals.setdefault('check_date_time', fields.Datetime.now())
-            if stage_scrap and new_stage.id == stage_scrap.id:
-                vals.setdefault('cancellation_date_time', fields.Datetime.now())
+            vals = self._prepare_stage_transition_vals(stage, vals)
+            reaches_done = stage.id in self.env['maintenance.stage']._get_stage_ids(STAGE_ROLE_DONE)
+
+        res = super(MaintenanceRequest, self).write(vals)
+        if reaches_done:
+            self._refresh_equipment_reliability()
+        return res
 
-        return super(MaintenanceRequest, self).write(vals)
+    def _refresh_equipment_reliability(self):
+        """Actualizar la fiabilidad de los equipos con solicitudes correctivas finalizadas."""
+        equipments = self.filtered(lambda r: r.maintenance_type == 'corrective').equipment_id
+        if equipments:
+            equipments._recompute_reliability()
+
+    def _split_stage_transition(self, stage):
+        """Separar las solicitudes que pueden pasar a ``stage`` de las rechazadas.
+
+        La etapa destino se clasifica y los permisos se comprueban una sola vez
+        para todo el lote. Devuelve ``(permitidas, {id: motivo})``.
+        """
+        stages = self.env['maintenance.stage']
+        rejected = {
+            request.id: _("No se puede mover esta solicitud porque está en una etapa restringida: '%s'.")
+            % request.stage_id.name
+            for request in self if request.is_finish
+        }
+        roles = stages._get_stage_classification()[0]
+        if stage.id not in roles:
+            raise ValidationError("La etapa especificada no existe.")
+
+        new_role, restricted = roles[stage.id]
+        reason = False
+        if new_role in (STAGE_ROLE_DONE, STAGE_ROLE_CANCELLED) and not self.env.context.get('allow_stage_change'):
+            reason = (
+                "No se puede mover esta solicitud al estado '%s' desde el tablero Kanban. "
+                "Por favor, utilice el botón correspondiente." % stage.name
+            )
+        elif restricted and not self.env.user.has_group('maintenance_time_records.group_maintenance_technical_admin'):
+            reason = _("No tiene los permisos necesarios para esta acción.")
+        if reason:
+            rejected.update({request.id: reason for request in self if request.id not in rejected})
+        return self.filtered(lambda r: r.id not in rejected), rejected
+
+    def _prepare_stage_transition_vals(self, stage, vals):
+        """Completar los sellos de fecha que corresponden a la etapa destino."""
+        stages = self.env['maintenance.stage']
+        vals = dict(vals)
+        if stage == stages._get_stage_for_role(STAGE_ROLE_DONE):
+            vals.setdefault('check_date_time', fields.Datetime.now())
+        if stage == stages._get_stage_for_role(STAGE_ROLE_CANCELLED):
+            vals.setdefault('cancellation_date_time', fields.Datetime.now())
+        return vals
+
+    def action_move_to_stage(self, stage_id):
+        """Mover en bloque las solicitudes a una etapa, omitiendo las que no pueden moverse.
+
+        Las permitidas se mueven con una sola escritura; el resultado se
+        informa con una notificación.
+        """
+        stage = self.env['maintenance.stage'].browse(stage_id)
+        allowed, rejected = self._split_stage_transition(stage)
+        to_move = allowed.filtered(lambda r: r.stage_id != stage)
+        if to_move:
+            to_move.write({'stage_id': stage.id})
+        message = _("%s solicitudes movidas a '%s'.") % (len(to_move), stage.name)
+        if rejected:
+            message += "\n" + _("%s solicitudes rechazadas: %s") % (len(rejected), next(iter(rejected.values())))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Cambio de etapa"),
+                'message': message,
+                'type': 'warning' if rejected else 'success',
+                'sticky': bool(rejected),
+            },
+        }
 
     @api.depends('schedule_date')
     def _compute_date_limit(self):
@@ -235,26 +383,33 @@ class MaintenanceRequest(models.Model):
                 last_day = first_of_next_month - timedelta(days=1)
                 request.date_limit = last_day
 
-    @api.depends('schedule_date', 'stage_id.name')
-    def _compute_is_previous_month_and_current(self):
-        today = fields.Date.today()
+    @api.model
+    def _get_month_windows(self, today=None):
+        """Devolver el primer día del mes anterior, del actual y del siguiente."""
+        today = today or fields.Date.today()
         first_day_of_current_month = today.replace(day=1)
         first_day_of_previous_month = (first_day_of_current_month - timedelta(days=1)).replace(day=1)
-        last_day_of_previous_month = first_day_of_current_month - timedelta(days=1)
-        last_day_of_current_month = (first_day_of_current_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        valid_stages = ['new request', 'nueva solicitud', 'in progress', 'en progreso']
+        first_day_of_next_month = (first_day_of_current_month + timedelta(days=32)).replace(day=1)
+        return first_day_of_previous_month, first_day_of_current_month, first_day_of_next_month
+
+    @api.model
+    def _get_month_flag_stage_ids(self):
+        return list(self.env['maintenance.stage']._get_stage_ids(STAGE_ROLE_NEW, STAGE_ROLE_IN_PROGRESS))
 
+    @api.depends('schedule_date', 'stage_id')
+    def _compute_is_previous_month_and_current(self):
+        first_day_of_previous_month, first_day_of_current_month, first_day_of_next_month = self._get_month_windows()
+        valid_stage_ids = self._get_month_flag_stage_ids()
         for record in self:
             if record.schedule_date:
                 schedule_date_as_date = (
                     record.schedule_date.date() if isinstance(record.schedule_date, datetime) else record.schedule_date
                 )
-                stage_name = record.stage_id.name.strip().lower() if record.stage_id and record.stage_id.name else ''
-                if first_day_of_previous_month <= schedule_date_as_date <= last_day_of_previous_month:
-                    record.is_previous_month = stage_name in valid_stages
+                if first_day_of_previous_month <= schedule_date_as_date < first_day_of_current_month:
+                    record.is_previous_month = record.stage_id.id in valid_stage_ids
                 else:
                     record.is_previous_month = False
-                if first_day_of_current_month <= schedule_date_as_date <= last_day_of_current_month:
+                if first_day_of_current_month <= schedule_date_as_date < first_day_of_next_month:
                     record.is_current_month = True
                 else:
                     record.is_current_month = False
@@ -262,87 +417,370 @@ class MaintenanceRequest(models.Model):
                 record.is_previous_month = False
                 record.is_current_month = False
 
-    def _recalculate_is_previous_and_current_month(self):
-        all_requests = self.search([])
-        all_requests._compute_is_previous_month_and_current()
-        return True
+    def _search_is_previous_month(self, operator, value):
+        first_prev, first_cur, __ = self._get_month_windows()
+        domain = [
+            ('schedule_date', '>=', fields.Datetime.to_datetime(first_prev)),
+            ('schedule_date', '<', fields.Datetime.to_datetime(first_cur)),
+            ('stage_id', 'in', self._get_month_flag_stage_ids()),
+        ]
+        return self._get_month_flag_domain(domain, operator, value)
 
-    def _close_open_time_records(self):
-        """Cerrar cualquier registro de tiempo sin fin asociado a la solicitud."""
-        now = fields.Datetime.now()
+    def _search_is_current_month(self, operator, value):
+        __, first_cur, first_next = self._get_month_windows()
+        domain = [
+            ('schedule_date', '>=', fields.Datetime.to_datetime(first_cur)),
+            ('schedule_date', '<', fields.Datetime.to_datetime(first_next)),
+        ]
+        return self._get_month_flag_domain(domain, operator, value)
+
+    @api.model
+    def _get_month_flag_domain(self, domain, operator, value):
+        """Traducir un filtro sobre los indicadores de mes al dominio por fechas."""
+        if operator not in ('=', '!='):
+            raise UserError(_("Operación no soportada para este filtro."))
+        if (operator == '=') == bool(value):
+            return domain
+        return ['!'] + expression.AND([domain])
+
+    def _close_open_time_records(self, end_datetime=None):
+        """Cerrar cualquier registro de tiempo sin fin asociado a las solicitudes.
+
+        Todos los tramos abiertos se cierran con un único UPDATE apoyado en el
+        índice parcial de registros abiertos. Los tramos activos cerrados quedan
+        pendientes de consolidar: la fila de la solicitud no se toca aquí.
+        """
+        if not self:
+            return
+        now = end_datetime or fields.Datetime.now()
+        time_records = self.env['maintenance.time_records']
+        time_records.flush_model(['maintenance_request_id', 'time_type', 'start_datetime', 'end_datetime'])
+        # El UPDATE no pasa por _check_dates: se valida antes el fin contra los inicios abiertos
+        self.env.cr.execute(
+            """
+            SELECT 1
+              FROM maintenance_time_records
+             WHERE maintenance_request_id = ANY(%s)
+               AND end_datetime IS NULL
+               AND start_datetime > %s
+             LIMIT 1
+            """,
+            (self.ids, now),
+        )
+        if self.env.cr.fetchone():
+            raise ValidationError("La fecha de fin debe ser posterior a la fecha de inicio.")
+        self.env.cr.execute(
+            """
+            UPDATE maintenance_time_records
+               SET end_datetime = %s,
+                   active_duration_pending = (time_type = 'active'),
+                   write_uid = %s,
+                   write_date = (now() AT TIME ZONE 'UTC')
+             WHERE maintenance_request_id = ANY(%s)
+               AND end_datetime IS NULL
+         RETURNING id
+            """,
+            (now, self.env.uid, self.ids),
+        )
+        closed_records = time_records.browse([row[0] for row in self.env.cr.fetchall()])
+        if closed_records:
+            closed_records.invalidate_recordset(['end_datetime', 'active_duration_pending', 'write_uid', 'write_date'])
+            closed_records.modified(['end_datetime'])
+
+    def _create_time_records(self, time_type, start_datetime, pause_cause=None, technicians=None):
+        """Abrir un tramo de tiempo en cada solicitud con un único create, sin escribir la solicitud."""
+        label = "Tiempo activo" if time_type == 'active' else "Pausa"
+        timer_users = self._get_timer_users(technicians)
+        time_records = self.env['maintenance.time_records'].with_context(**{DEFER_ACTIVE_DURATION_CONTEXT: True})
+        return time_records.create([{
+            'maintenance_request_id': request.id,
+            'user_id': timer_users[request.id].id,
+            'time_type': time_type,
+            'pause_cause_id': pause_cause.id if pause_cause else False,
+            'start_datetime': start_datetime,
+            'active_duration_pending': time_type == 'active',
+            'name': f"{label} - {request.name or request.code or ''}",
+        } for request in self])
+
+    def _get_timer_users(self, technicians=None):
+        """Técnico al que se imputa el tiempo de cada solicitud: ``{request_id: usuario}``.
+
+        Por defecto es quien registra el tiempo; un supervisor puede indicar
+        otro técnico por solicitud en ``technicians`` (``{request_id: user_id}``).
+        """
+        technicians = technicians or {}
+        users = self.env['res.users']
+        return {
+            request.id: users.browse(technicians[request.id]) if technicians.get(request.id) else self.env.user
+            for request in self
+        }
+
+    def _split_running_timers(self, technicians=None):
+        """Separar las solicitudes que pueden abrir un tramo activo de las rechazadas.
+
+        Cada técnico tiene como mucho un cronómetro activo: se rechazan las
+        solicitudes de técnicos que ya tienen uno en otra solicitud o que
+        aparecen más de una vez en la selección. Devuelve ``(permitidas, {id: motivo})``.
+        """
+        timer_users = self._get_timer_users(technicians)
+        running = {
+            record.user_id: record.maintenance_request_id
+            for record in self.env['maintenance.time_records']._get_running_timers(
+                self.env['res.users'].union(*timer_users.values())
+            )
+        }
+        is_manager = self.env.user.has_group('maintenance.group_equipment_manager')
+        claimed = self.env['res.users']
+        rejected = {}
         for request in self:
-            open_records = request.time_record_ids.filtered(lambda r: not r.end_datetime)
-            if open_records:
-                open_records.write({'end_datetime': now})
+            user = timer_users[request.id]
+            if user != self.env.user and not is_manager:
+                rejected[request.id] = _("Solo un responsable puede registrar tiempo a nombre de otro técnico.")
+            elif user in claimed:
+                rejected[request.id] = _("%s no puede iniciar varias solicitudes a la vez.") % user.name
+            elif user in running and running[user] != request:
+                rejected[request.id] = _("%s ya tiene un cronómetro activo en %s.") % (
+                    user.name, running[user].display_name
+                )
+            else:
+                claimed |= user
+        return self.filtered(lambda r: r.id not in rejected), rejected
 
-    def action_start_time(self):
-        self.ensure_one()
-        now = fields.Datetime.now()
-        self._close_open_time_records()
-        stage_in_progress = self.env.ref('maintenance.stage_1', raise_if_not_found=False)
-        self.env['maintenance.time_records'].create({
-            'maintenance_request_id': self.id,
-            'time_type': 'active',
-            'start_datetime': now,
-            'name': f"Tiempo activo - {self.name or self.code or ''}",
-        })
-        if not self.start_date:
-            self.start_date = now
-        self.time_state = 'active'
-        if stage_in_progress and self.stage_id != stage_in_progress:
-            self.stage_id = stage_in_progress.id
+    def _get_timer_notification(self, title, done_count, rejected):
+        """Informar las solicitudes omitidas de una acción de cronómetro en bloque."""
+        if not rejected:
+            return False
+        message = _("%s solicitudes procesadas.") % done_count
+        message += "\n" + _("%s solicitudes omitidas: %s") % (len(rejected), "; ".join(
+            "%s (%s)" % (self.browse(request_id).display_name, reason) for request_id, reason in rejected.items()
+        ))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'title': title, 'message': message, 'type': 'warning', 'sticky': True},
+        }
+
+    def _move_to_stage(self, stage, **context):
+        """Mover a la etapa solo las solicitudes que no están ya en ella, con una sola escritura."""
+        if stage:
+            to_move = self.filtered(lambda r: r.stage_id != stage)
+            if to_move:
+                to_move.with_context(**context).write({'stage_id': stage.id})
 
+    @instrumented
+    def action_start_time(self, technicians=None):
+        allowed, rejected = self._start_time(fields.Datetime.now(), technicians)
+        return self._get_timer_notification(_("Iniciar tiempo"), len(allowed), rejected)
+
+    @instrumented
     def action_finish_time(self):
-        self.ensure_one()
-        self._close_open_time_records()
-        now = fields.Datetime.now()
-        if not self.end_date:
-            self.end_date = now
-        self.time_state = 'done'
-        stage_revision = self.env.ref('maintenance_time_records.maintenance_stage_revision', raise_if_not_found=False)
-        if stage_revision and self.stage_id != stage_revision:
-            # allow changing to revision when finishing time tracking
-            self.with_context(allow_stage_change=True).stage_id = stage_revision.id
-
-    def action_continue_time(self):
-        self.ensure_one()
-        now = fields.Datetime.now()
-        self._close_open_time_records()
-        self.env['maintenance.time_records'].create({
-            'maintenance_request_id': self.id,
-            'time_type': 'active',
-            'start_datetime': now,
-            'name': f"Tiempo activo - {self.name or self.code or ''}",
-        })
-        self.time_state = 'active'
+        self._finish_time(fields.Datetime.now())
+
+    @instrumented
+    def action_continue_time(self, technicians=None):
+        allowed, rejected = self._continue_time(fields.Datetime.now(), technicians)
+        return self._get_timer_notification(_("Continuar tiempo"), len(allowed), rejected)
+
+    def _start_time(self, at, technicians=None):
+        """Abrir el tramo activo de las solicitudes permitidas; devuelve ``(permitidas, {id: motivo})``."""
+        allowed, rejected = self._split_running_timers(technicians)
+        allowed._close_open_time_records(at)
+        allowed._create_time_records('active', at, technicians=technicians)
+        allowed.filtered(lambda r: not r.start_date).write({'start_date': at})
+        allowed._move_to_stage(self.env['maintenance.stage']._get_stage_for_role(STAGE_ROLE_IN_PROGRESS))
+        return allowed, rejected
+
+    def _finish_time(self, at):
+        self._close_open_time_records(at)
+        without_end = self.filtered(lambda r: not r.end_date)
+        without_end.write({'end_date': at, 'time_finished': True})
+        (self - without_end).filtered(lambda r: not r.time_finished).write({'time_finished': True})
+        # allow changing to revision when finishing time tracking
+        self._move_to_stage(
+            self.env['maintenance.stage']._get_stage_for_role(STAGE_ROLE_REVISION),
+            allow_stage_change=True,
+        )
 
+    def _continue_time(self, at, technicians=None):
+        """Reanudar el tramo activo de las solicitudes permitidas; devuelve ``(permitidas, {id: motivo})``."""
+        allowed, rejected = self._split_running_timers(technicians)
+        allowed._close_open_time_records(at)
+        allowed._create_time_records('active', at, technicians=technicians)
+        return allowed, rejected
+
+    @instrumented
+    def _pause_time(self, pause_cause, at=None):
+        at = at or fields.Datetime.now()
+        self._close_open_time_records(at)
+        self._create_time_records('pause', at, pause_cause)
+
+    @instrumented
     def action_pause_time(self):
-        self.ensure_one()
+        if not self:
+            return False
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'maintenance.pause.wizard',
             'view_mode': 'form',
             'target': 'new',
             'context': {
-                'default_maintenance_request_id': self.id,
+                'default_maintenance_request_id': self.id if len(self) == 1 else False,
+                'default_maintenance_request_ids': [(6, 0, self.ids)],
             },
         }
 
-    @api.depends('time_record_ids.time_type', 'time_record_ids.start_datetime', 'time_record_ids.end_datetime')
+    def _get_open_time_types(self):
+        """Tipo del tramo abierto más reciente de cada solicitud, por el índice parcial de abiertos."""
+        request_ids = [request_id for request_id in self._origin.ids if request_id]
+        if not request_ids:
+            return {}
+        self.env['maintenance.time_records'].flush_model(['maintenance_request_id', 'time_type', 'end_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (maintenance_request_id) maintenance_request_id, time_type
+              FROM maintenance_time_records
+             WHERE maintenance_request_id = ANY(%s)
+               AND end_datetime IS NULL
+          ORDER BY maintenance_request_id, start_datetime DESC
+            """,
+            (request_ids,),
+        )
+        return dict(self.env.cr.fetchall())
+
+    @api.depends('time_finished', 'time_record_ids.time_type', 'time_record_ids.end_datetime')
+    def _compute_time_state(self):
+        """Derivar el estado del cronómetro de los tramos abiertos en lugar de guardarlo en la solicitud."""
+        open_types = self._get_open_time_types()
+        for request in self:
+            open_type = open_types.get(request._origin.id)
+            if open_type:
+                request.time_state = open_type
+            elif request.time_finished:
+                request.time_state = 'done'
+            else:
+                request.time_state = 'idle'
+
+    def _search_time_state(self, operator, value):
+        if operator not in ('=', '!=', 'in', 'not in'):
+            raise UserError(_("Operación no soportada sobre el estado del cronómetro."))
+        states = {value} if isinstance(value, str) else set(value or ())
+        self.env['maintenance.time_records'].flush_model(['maintenance_request_id', 'time_type', 'end_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (maintenance_request_id) maintenance_request_id, time_type
+              FROM maintenance_time_records
+             WHERE end_datetime IS NULL
+          ORDER BY maintenance_request_id, start_datetime DESC
+            """
+        )
+        open_types = dict(self.env.cr.fetchall())
+        domains = []
+        for state in states & {'active', 'pause'}:
+            domains.append([('id', 'in', [rid for rid, time_type in open_types.items() if time_type == state])])
+        if 'done' in states:
+            domains.append([('id', 'not in', list(open_types)), ('time_finished', '=', True)])
+        if 'idle' in states:
+            domains.append([('id', 'not in', list(open_types)), ('time_finished', '=', False)])
+        domain = expression.OR(domains) if domains else expression.FALSE_DOMAIN
+        if operator in ('!=', 'not in'):
+            return ['!'] + expression.normalize_domain(domain)
+        return domain
+
+    def _get_pending_active_duration(self):
+        """Segundos activos cerrados aún sin consolidar y comienzo del tramo activo abierto."""
+        request_ids = [request_id for request_id in self._origin.ids if request_id]
+        if not request_ids:
+            return {}
+        self.env['maintenance.time_records'].flush_model(
+            ['maintenance_request_id', 'time_type', 'start_datetime', 'end_datetime', 'active_duration_pending']
+        )
+        self.env.cr.execute(
+            """
+            SELECT maintenance_request_id,
+                   COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM end_datetime - start_datetime), 0))
+                            FILTER (WHERE end_datetime IS NOT NULL), 0),
+                   MIN(start_datetime) FILTER (WHERE end_datetime IS NULL)
+              FROM maintenance_time_records
+             WHERE maintenance_request_id = ANY(%s)
+               AND time_type = 'active'
+               AND (end_datetime IS NULL OR active_duration_pending)
+          GROUP BY maintenance_request_id
+            """,
+            (request_ids,),
+        )
+        return {request_id: (seconds, open_start) for request_id, seconds, open_start in self.env.cr.fetchall()}
+
+    @api.depends('active_duration_closed_seconds', 'time_record_ids.end_datetime')
     def _compute_total_active_duration(self):
+        now = fields.Datetime.now()
+        pending = self._get_pending_active_duration()
         for request in self:
-            total_seconds = 0
-            active_records = request.time_record_ids.filtered(lambda r: r.time_type == 'active')
-            for rec in active_records:
-                if rec.start_datetime:
-                    end_time = rec.end_datetime or fields.Datetime.now()
-                    delta_seconds = max((end_time - rec.start_datetime).total_seconds(), 0)
-                    total_seconds += delta_seconds
+            pending_seconds, open_start = pending.get(request._origin.id, (0.0, False))
+            total_seconds = request.active_duration_closed_seconds + pending_seconds
+            if open_start:
+                total_seconds += max((now - open_start).total_seconds(), 0)
             hours = int(total_seconds // 3600)
             minutes = int((total_seconds % 3600) // 60)
             seconds = int(total_seconds % 60)
             hours_float = total_seconds / 3600.0 if total_seconds else 0.0
             request.total_active_duration_hours = round(hours_float, 2)
-            request.duration = round(hours_float, 2)
             # Mostrar hh:mm:ss
             request.total_active_duration_display = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+    @api.model
+    def _apply_active_duration_deltas(self, closed_deltas):
+        """Acumular segundos activos cerrados en las solicitudes.
+
+        ``closed_deltas`` asocia cada solicitud a los segundos que se suman (o
+        restan) a su total cerrado. El tramo abierto no se guarda: se suma al leer.
+        """
+        closed_deltas = {request_id: delta for request_id, delta in closed_deltas.items() if delta}
+        if not closed_deltas:
+            return
+        self.flush_model(['active_duration_closed_seconds', 'duration'])
+        self.env.cr.execute(
+            """
+            UPDATE maintenance_request r
+               SET active_duration_closed_seconds = GREATEST(COALESCE(r.active_duration_closed_seconds, 0) + d.delta, 0),
+                   duration = ROUND((GREATEST(COALESCE(r.active_duration_closed_seconds, 0) + d.delta, 0) / 3600.0)::numeric, 2)
+              FROM unnest(%s::int[], %s::float8[]) AS d(request_id, delta)
+             WHERE r.id = d.request_id
+            """,
+            (list(closed_deltas), list(closed_deltas.values())),
+        )
+        self.browse(list(closed_deltas)).invalidate_recordset(['active_duration_closed_seconds', 'duration'])
+
+    @api.model
+    def _recompute_active_duration(self, request_ids, folded_record_ids=()):
+        """Recalcular desde los registros de tiempo el tiempo activo de las solicitudes en una consulta.
+
+        Los tramos pendientes de consolidar solo se suman si están en
+        ``folded_record_ids``; el resto se sigue sumando en tiempo de lectura.
+        """
+        request_ids = list(set(request_ids))
+        if not request_ids:
+            return
+        self.env['maintenance.time_records'].flush_model(
+            ['maintenance_request_id', 'time_type', 'start_datetime', 'end_datetime', 'active_duration_pending']
+        )
+        self.flush_model(['active_duration_closed_seconds', 'duration'])
+        self.env.cr.execute(
+            """
+            UPDATE maintenance_request r
+               SET active_duration_closed_seconds = t.seconds,
+                   duration = ROUND((t.seconds / 3600.0)::numeric, 2)
+              FROM (
+                    SELECT ids.id,
+                           COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM tr.end_datetime - tr.start_datetime), 0))
+                                    FILTER (WHERE tr.end_datetime IS NOT NULL
+                                              AND (tr.active_duration_pending IS NOT TRUE OR tr.id = ANY(%s::int[]))), 0) AS seconds
+                      FROM unnest(%s::int[]) AS ids(id)
+                      LEFT JOIN maintenance_time_records tr
+                             ON tr.maintenance_request_id = ids.id AND tr.time_type = 'active'
+                  GROUP BY ids.id
+                   ) t
+             WHERE r.id = t.id
+            """,
+            (list(folded_record_ids), request_ids),
+        )
+        self.browse(request_ids).invalidate_recordset(['active_duration_closed_seconds', 'duration'])
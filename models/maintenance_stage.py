@@ -0,0 +1,112 @@
+from odoo import api, models, tools
+
+STAGE_ROLE_NEW = 'new'
+STAGE_ROLE_IN_PROGRESS = 'in_progress'
+STAGE_ROLE_REVISION = 'revision'
+STAGE_ROLE_DONE = 'done'
+STAGE_ROLE_CANCELLED = 'cancelled'
+
+# Las etapas se clasifican primero por identificador externo y luego por nombre,
+# en cualquiera de sus traducciones.
+STAGE_ROLE_XMLIDS = {
+    'maintenance.stage_0': STAGE_ROLE_NEW,
+    'maintenance.stage_1': STAGE_ROLE_IN_PROGRESS,
+    'maintenance_time_records.maintenance_stage_revision': STAGE_ROLE_REVISION,
+    'maintenance.stage_3': STAGE_ROLE_DONE,
+    'maintenance.stage_4': STAGE_ROLE_CANCELLED,
+}
+STAGE_ROLE_NAMES = {
+    'nueva solicitud': STAGE_ROLE_NEW,
+    'new request': STAGE_ROLE_NEW,
+    'en progreso': STAGE_ROLE_IN_PROGRESS,
+    'in progress': STAGE_ROLE_IN_PROGRESS,
+    'revisión': STAGE_ROLE_REVISION,
+    'reparado': STAGE_ROLE_DONE,
+    'repaired': STAGE_ROLE_DONE,
+    'done': STAGE_ROLE_DONE,
+    'finalizado': STAGE_ROLE_DONE,
+    'desechar': STAGE_ROLE_CANCELLED,
+    'scrap': STAGE_ROLE_CANCELLED,
+    'cancelled': STAGE_ROLE_CANCELLED,
+    'cancelado': STAGE_ROLE_CANCELLED,
+}
+# Etapas de cierre que solo el Administrador de Técnico puede asignar y que
+# bloquean cualquier cambio posterior de etapa.
+RESTRICTED_STAGE_NAMES = {'finalizado', 'cancelado'}
+
+
+class MaintenanceStage(models.Model):
+    _inherit = 'maintenance.stage'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        stages = super().create(vals_list)
+        self.clear_caches()
+        return stages
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+    @tools.ormcache()
+    def _get_stage_classification(self):
+        """Clasificar todas las etapas una sola vez por registro.
+
+        Devuelve ``(roles, defaults)``: ``roles`` asocia cada id de etapa a
+        ``(rol, restringida)`` y ``defaults`` asocia cada rol a la etapa que lo
+        representa, priorizando la definida por identificador externo.
+        """
+        self.flush_model(['name', 'sequence'])
+        self.env.cr.execute(
+            "SELECT res_id, module || '.' || name FROM ir_model_data WHERE model = 'maintenance.stage'"
+        )
+        xmlid_roles = {
+            res_id: STAGE_ROLE_XMLIDS[xmlid]
+            for res_id, xmlid in self.env.cr.fetchall()
+            if xmlid in STAGE_ROLE_XMLIDS
+        }
+        self.env.cr.execute("SELECT id, name FROM maintenance_stage ORDER BY sequence, id")
+        roles = {}
+        candidates = {}
+        for position, (stage_id, name) in enumerate(self.env.cr.fetchall()):
+            names = name.values() if isinstance(name, dict) else [name]
+            names = {(value or '').strip().lower() for value in names}
+            role = xmlid_roles.get(stage_id)
+            if not role:
+                role = next((STAGE_ROLE_NAMES[value] for value in sorted(names) if value in STAGE_ROLE_NAMES), False)
+            restricted = bool(names & RESTRICTED_STAGE_NAMES)
+            roles[stage_id] = (role, restricted)
+            if role:
+                priority = (stage_id not in xmlid_roles, restricted, position)
+                candidates.setdefault(role, []).append((priority, stage_id))
+        defaults = {role: min(stages)[1] for role, stages in candidates.items()}
+        return roles, defaults
+
+    @api.model
+    def _get_stage_role(self, stage_id):
+        return self._get_stage_classification()[0].get(stage_id, (False, False))[0]
+
+    @api.model
+    def _get_stage_ids(self, *roles):
+        return {
+            stage_id for stage_id, (role, __) in self._get_stage_classification()[0].items()
+            if role in roles
+        }
+
+    @api.model
+    def _get_restricted_stage_ids(self):
+        return {
+            stage_id for stage_id, (__, restricted) in self._get_stage_classification()[0].items()
+            if restricted
+        }
+
+    @api.model
+    def _get_stage_for_role(self, role):
+        """Devolver la etapa por defecto de un rol, o un recordset vacío."""
+        return self.browse(self._get_stage_classification()[1].get(role))
@@ -0,0 +1,238 @@
+from odoo import api, fields, models, tools
+import csv
+import io
+import logging
+import os
+import tempfile
+import threading
+import xlsxwriter
+
+_logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_SAFETY_LAG_SECONDS = 60
+EXPORT_CURSOR_NAME = 'maintenance_time_export_cursor'
+EXPORT_WATERMARK_PARAM = 'maintenance_time_records.time_export_watermark'
+EXPORT_DIRECTORY_PARAM = 'maintenance_time_records.time_export_directory'
+EXPORT_FORMATS = {
+    'csv': 'text/csv;charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_HEADERS = [
+    'ID', 'Solicitud ID', 'Solicitud', 'Equipo', 'Categoría', 'Técnico (usuario)', 'Técnico',
+    'Tipo', 'Causa de pausa', 'Inicio', 'Fin', 'Duración (horas)', 'Cuenta analítica',
+    'Compañía', 'Descripción', 'Última modificación',
+]
+# Índices de las columnas de fecha, que se exportan como texto en UTC.
+EXPORT_DATETIME_COLUMNS = (9, 10, 15)
+
+
+class MaintenanceTimeExport(models.AbstractModel):
+    _name = 'maintenance.time.export'
+    _description = 'Exportación de registros de tiempo'
+
+    def _get_export_query(self):
+        return """
+            SELECT tr.id,
+                   r.id,
+                   r.name,
+                   e.name,
+                   COALESCE(c.name->>%(lang)s, c.name->>'en_US'),
+                   u.login,
+                   up.name,
+                   tr.time_type,
+                   pc.name,
+                   tr.start_datetime,
+                   tr.end_datetime,
+                   tr.duration_hours,
+                   a.name,
+                   co.name,
+                   tr.description,
+                   tr.write_date
+              FROM maintenance_time_records tr
+              JOIN maintenance_request r ON r.id = tr.maintenance_request_id
+         LEFT JOIN maintenance_equipment e ON e.id = r.equipment_id
+         LEFT JOIN maintenance_equipment_category c ON c.id = e.category_id
+         LEFT JOIN res_users u ON u.id = tr.user_id
+         LEFT JOIN res_partner up ON up.id = u.partner_id
+         LEFT JOIN maintenance_pause_cause pc ON pc.id = tr.pause_cause_id
+         LEFT JOIN account_analytic_account a ON a.id = tr.account_id
+         LEFT JOIN res_company co ON co.id = tr.company_id
+             WHERE tr.end_datetime IS NOT NULL
+               AND tr.company_id = ANY(%(company_ids)s)
+               AND tr.write_date < %(until)s
+               AND (%(since)s::timestamp IS NULL OR tr.write_date >= %(since)s::timestamp)
+          ORDER BY tr.write_date, tr.id
+        """
+
+    def _get_watermark_param(self, feed):
+        # Cada destino (nómina, ERP...) avanza su propia marca de agua.
+        return '%s.%s' % (EXPORT_WATERMARK_PARAM, feed)
+
+    @api.model
+    def _get_export_until(self, since=None):
+        """Límite superior seguro de la exportación.
+
+        ``write_date`` guarda el inicio de la transacción que escribe, por lo
+        que una fila puede confirmarse después de la exportación con una fecha
+        anterior a ella. Se exporta hasta el inicio de la transacción abierta
+        más antigua (y con un margen fijo), sin incluirlo: sus filas llevan
+        exactamente esa fecha y entran en la ejecución siguiente. Nunca
+        retrocede antes de ``since``.
+        """
+        self.env.cr.execute(
+            """
+            SELECT LEAST(
+                       now() - make_interval(secs => %s),
+                       (SELECT MIN(xact_start) FROM pg_stat_activity
+                         WHERE datname = current_database()
+                           AND pid <> pg_backend_pid()
+                           AND xact_start IS NOT NULL)
+                   ) AT TIME ZONE 'UTC'
+            """,
+            (EXPORT_SAFETY_LAG_SECONDS,),
+        )
+        until = self.env.cr.fetchone()[0]
+        since = fields.Datetime.to_datetime(since) if since else None
+        if since and until <= since:
+            _logger.warning(
+                "La exportación de registros de tiempo no avanza desde %s: hay una transacción "
+                "abierta desde antes (revise las sesiones 'idle in transaction').", since
+            )
+            return since
+        return until
+
+    @api.model
+    def _iter_export_chunks(self, since, until, chunk_size=EXPORT_CHUNK_SIZE):
+        """Leer por bloques, con un cursor del servidor, los registros cerrados
+        modificados en el intervalo ``[since, until)``."""
+        cr = self.env.cr
+        cr.execute(
+            "DECLARE %s NO SCROLL CURSOR FOR %s" % (EXPORT_CURSOR_NAME, self._get_export_query()),
+            {
+                'lang': self.env.lang or 'en_US',
+                'company_ids': self.env.companies.ids,
+                'until': until,
+                'since': since or None,
+            },
+        )
+        try:
+            while True:
+                cr.execute("FETCH FORWARD %s FROM %s" % (int(chunk_size), EXPORT_CURSOR_NAME))
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                yield [self._format_export_row(row) for row in rows]
+        finally:
+            cr.execute("CLOSE %s" % EXPORT_CURSOR_NAME)
+
+    def _format_export_row(self, row):
+        row = list(row)
+        for index in EXPORT_DATETIME_COLUMNS:
+            row[index] = fields.Datetime.to_string(row[index]) if row[index] else ''
+        return row
+
+    @api.model
+    def _write_csv(self, chunks):
+        """Producir el CSV en bytes, un bloque por cada lectura del cursor."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_HEADERS)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    @api.model
+    def _write_xlsx(self, chunks, fileobj):
+        """Escribir el XLSX en ``fileobj`` en modo de memoria constante."""
+        workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'in_memory': False})
+        worksheet = workbook.add_worksheet('Registros de tiempo')
+        worksheet.write_row(0, 0, EXPORT_HEADERS)
+        row_index = 1
+        for rows in chunks:
+            for row in rows:
+                worksheet.write_row(row_index, 0, row)
+                row_index += 1
+        workbook.close()
+        return row_index - 1
+
+    @api.model
+    def _export_to_file(self, path, file_format='csv', since=None):
+        """Exportar a ``path`` y devolver la marca de agua alcanzada.
+
+        Se escribe en un archivo temporal que se renombra al terminar, de modo
+        que un proceso que lea el directorio nunca ve un archivo a medias.
+        """
+        self.env['maintenance.time_records'].flush_model()
+        until = self._get_export_until(since)
+        chunks = self._iter_export_chunks(since, until)
+        partial_path = path + '.part'
+        if file_format == 'xlsx':
+            self._write_xlsx(chunks, partial_path)
+        else:
+            with open(partial_path, 'wb') as fileobj:
+                for data in self._write_csv(chunks):
+                    fileobj.write(data)
+        os.replace(partial_path, path)
+        return until
+
+    @api.model
+    def _stream_export(self, file_format='csv', since=None, feed=None):
+        """Generar la exportación por bloques en un cursor propio del registro.
+
+        El cursor de la petición HTTP se cierra antes de enviar la respuesta,
+        por lo que la lectura usa uno nuevo con el mismo usuario y compañías.
+        Con ``feed`` se parte de la marca de agua guardada para ese destino y
+        se avanza solo al terminar el envío completo.
+        """
+        uid, context = self.env.uid, dict(self.env.context)
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            export = env[self._name]
+            params = env['ir.config_parameter'].sudo()
+            if feed:
+                since = params.get_param(export._get_watermark_param(feed)) or None
+            until = export._get_export_until(since)
+            chunks = export._iter_export_chunks(since, until)
+            if file_format == 'xlsx':
+                # xlsxwriter solo compone el libro al cerrarlo: se vuelca a un
+                # archivo temporal en disco y se envía por bloques.
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, 'export.xlsx')
+                    export._write_xlsx(chunks, path)
+                    with open(path, 'rb') as fileobj:
+                        while True:
+                            data = fileobj.read(io.DEFAULT_BUFFER_SIZE * 16)
+                            if not data:
+                                break
+                            yield data
+            else:
+                yield from export._write_csv(chunks)
+            if feed:
+                params.set_param(export._get_watermark_param(feed), fields.Datetime.to_string(until))
+
+    @api.model
+    def _get_export_directory(self):
+        directory = self.env['ir.config_parameter'].sudo().get_param(EXPORT_DIRECTORY_PARAM) or os.path.join(
+            tools.config['data_dir'], 'maintenance_time_exports', self.env.cr.dbname
+        )
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @api.model
+    def _cron_export_time_records(self, file_format='csv', feed='nightly'):
+        """Exportar los registros modificados desde la última ejecución al directorio configurado."""
+        params = self.env['ir.config_parameter'].sudo()
+        since = params.get_param(self._get_watermark_param(feed)) or None
+        filename = 'registros_tiempo_%s.%s' % (fields.Datetime.now().strftime('%Y%m%d_%H%M%S'), file_format)
+        path = os.path.join(self._get_export_directory(), filename)
+        until = self._export_to_file(path, file_format=file_format, since=since)
+        params.set_param(self._get_watermark_param(feed), fields.Datetime.to_string(until))
+        _logger.info("Registros de tiempo exportados en %s (hasta %s).", path, until)
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+        return True
@@ -1,6 +1,25 @@
+from collections import defaultdict
 from datetime import timedelta
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools import split_every
+from .maintenance_perf_metric import instrumented
+import csv
+import psycopg2
+import io
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# Campos que modifican el tiempo activo acumulado en la solicitud
+ACTIVE_DURATION_FIELDS = {'maintenance_request_id', 'time_type', 'start_datetime', 'end_datetime'}
+# Clave de contexto que aplaza la actualización del tiempo activo de las solicitudes;
+# quien la usa debe llamar después a ``_recompute_active_duration``.
+DEFER_ACTIVE_DURATION_CONTEXT = 'maintenance_defer_active_duration'
+IMPORT_BATCH_SIZE = 1000
+PENDING_FOLD_BATCH_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 20
 
 
 class MaintenanceTimeRecord(models.Model):
@@ -71,13 +90,361 @@ class MaintenanceTimeRecord(models.Model):
     date = fields.Date(
         default=lambda self: fields.Date.context_today(self)
     )
+    active_duration_pending = fields.Boolean(
+        string='Pendiente de consolidar',
+        readonly=True,
+        copy=False,
+        help="Tramo activo registrado por el cronómetro cuyo tiempo aún no se sumó a la solicitud."
+    )
+
+    _sql_constraints = [
+        (
+            'user_active_overlap',
+            "EXCLUDE USING gist (user_id WITH =, "
+            "tsrange(start_datetime, COALESCE(end_datetime, 'infinity'::timestamp), '[)') WITH &&) "
+            "WHERE (time_type = 'active')",
+            'Un técnico no puede tener tramos de tiempo activo superpuestos.',
+        ),
+    ]
+
+    def _auto_init(self):
+        # La restricción de exclusión combina igualdad sobre enteros y rangos en GiST
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except psycopg2.Error:
+            _logger.warning("No se pudo instalar la extensión btree_gist; no se impedirán tramos superpuestos.")
+        return super()._auto_init()
+
+    def init(self):
+        super().init()
+        # Como mucho un tramo activo abierto por técnico; también sirve a _get_running_timers
+        try:
+            with self.env.cr.savepoint():
+                self.env.cr.execute(
+                    """
+                    CREATE UNIQUE INDEX IF NOT EXISTS maintenance_time_records_user_open_active_index
+                        ON maintenance_time_records (user_id)
+                     WHERE end_datetime IS NULL AND time_type = 'active'
+                    """
+                )
+        except psycopg2.Error:
+            _logger.warning(
+                "No se pudo crear el índice de un único cronómetro activo por técnico: "
+                "existen técnicos con varios tramos activos abiertos."
+            )
+        # Acceso directo a los tramos abiertos de cada solicitud al iniciar/pausar/finalizar
+        tools.create_index(
+            self._cr, 'maintenance_time_records_open_request_index',
+            self._table, ['maintenance_request_id'], where='end_datetime IS NULL'
+        )
+        tools.create_index(
+            self._cr, 'maintenance_time_records_pending_request_index',
+            self._table, ['maintenance_request_id'], where='active_duration_pending'
+        )
+
+    @api.model_create_multi
+    @instrumented
+    def create(self, vals_list):
+        self._set_maintenance_analytic_accounts(vals_list)
+        records = super().create(vals_list)
+        if self.env.context.get(DEFER_ACTIVE_DURATION_CONTEXT):
+            return records
+        self.env['maintenance.request']._apply_active_duration_deltas(records._get_active_contributions())
+        return records
+
+    @instrumented
+    def write(self, vals):
+        if not ACTIVE_DURATION_FIELDS & set(vals) or self.env.context.get(DEFER_ACTIVE_DURATION_CONTEXT):
+            return super().write(vals)
+        closed_before = self._get_active_contributions()
+        res = super().write(vals)
+        deltas = defaultdict(float, self._get_active_contributions())
+        for request_id, seconds in closed_before.items():
+            deltas[request_id] -= seconds
+        self.env['maintenance.request']._apply_active_duration_deltas(deltas)
+        return res
+
+    def unlink(self):
+        if self.env.context.get(DEFER_ACTIVE_DURATION_CONTEXT):
+            return super().unlink()
+        closed_seconds = self._get_active_contributions()
+        res = super().unlink()
+        deltas = {request_id: -seconds for request_id, seconds in closed_seconds.items()}
+        self.env['maintenance.request']._apply_active_duration_deltas(deltas)
+        return res
+
+    def _get_active_contributions(self):
+        """Segundos activos cerrados por solicitud; el tramo abierto se suma al leer."""
+        closed_seconds = defaultdict(float)
+        for record in self:
+            if record.time_type != 'active' or not record.start_datetime or not record.maintenance_request_id:
+                continue
+            if record.active_duration_pending or not record.end_datetime:
+                # Su tiempo se suma al consolidar o en tiempo de lectura, no en la solicitud
+                continue
+            request_id = record.maintenance_request_id.id
+            closed_seconds[request_id] += max((record.end_datetime - record.start_datetime).total_seconds(), 0)
+        return closed_seconds
+
+    @api.model
+    def _cron_fold_pending_active_duration(self, batch_size=PENDING_FOLD_BATCH_SIZE):
+        """Consolidar en las solicitudes el tiempo de los tramos cerrados por el cronómetro.
+
+        Los registros pendientes se toman con ``SKIP LOCKED``, así que la tarea
+        nunca espera a un clic en curso; cada solicitud afectada se actualiza
+        una sola vez por lote, en lugar de una vez por clic.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        folded = 0
+        while True:
+            self.flush_model(['active_duration_pending'])
+            self.env.cr.execute(
+                """
+                SELECT id, maintenance_request_id
+                  FROM maintenance_time_records
+                 WHERE active_duration_pending
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+                """,
+                (batch_size,),
+            )
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            record_ids = [row[0] for row in rows]
+            self.env['maintenance.request']._recompute_active_duration(
+                {row[1] for row in rows}, folded_record_ids=record_ids
+            )
+            self.env.cr.execute(
+                "UPDATE maintenance_time_records SET active_duration_pending = false WHERE id = ANY(%s)",
+                (record_ids,),
+            )
+            self.browse(record_ids).invalidate_recordset(['active_duration_pending'])
+            folded += len(record_ids)
+            if auto_commit:
+                self.env.cr.commit()
+            if len(rows) < batch_size:
+                break
+        if folded:
+            _logger.info("Tiempo activo consolidado de %s registros de tiempo", folded)
+        return folded
+
+    @api.model
+    def import_time_records(self, data, batch_size=IMPORT_BATCH_SIZE):
+        """Importar registros de tiempo históricos por lotes.
+
+        ``data`` es un texto CSV con cabecera o una lista de diccionarios con las
+        claves ``maintenance_request_id`` (id o código), ``user_id`` (id o
+        usuario), ``time_type``, ``pause_cause_id`` (id o nombre),
+        ``start_datetime``, ``end_datetime`` y ``description``. Todo se valida
+        antes de insertar y el tiempo activo de cada solicitud se recalcula una
+        sola vez al final. Devuelve la cantidad de registros importados.
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8-sig')
+        rows = list(csv.DictReader(io.StringIO(data))) if isinstance(data, str) else list(data)
+        vals_list = self._prepare_import_vals(rows, first_line=2 if isinstance(data, str) else 1)
+
+        deferred = self.with_context(**{DEFER_ACTIVE_DURATION_CONTEXT: True})
+        imported = 0
+        for batch in split_every(batch_size, vals_list, list):
+            deferred.create(batch)
+            # Volcar y soltar la caché para que la memoria no crezca con la importación
+            self.env.flush_all()
+            self.env.invalidate_all()
+            imported += len(batch)
+            _logger.info("Importación de registros de tiempo: %s de %s", imported, len(vals_list))
+        self.env['maintenance.request']._recompute_active_duration(
+            {vals['maintenance_request_id'] for vals in vals_list}
+        )
+        return imported
+
+    @api.model
+    def _prepare_import_vals(self, rows, first_line=1):
+        """Validar las filas a importar y resolver sus referencias con una consulta por modelo."""
+        requests = self._resolve_import_references(
+            [row.get('maintenance_request_id') for row in rows], 'maintenance.request', 'code'
+        )
+        users = self._resolve_import_references([row.get('user_id') for row in rows], 'res.users', 'login')
+        causes = self._resolve_import_references(
+            [row.get('pause_cause_id') for row in rows], 'maintenance.pause.cause', 'name'
+        )
+        errors = []
+        vals_list = []
+        lines = []
+        for line, row in enumerate(rows, first_line):
+            try:
+                request_id = requests.get(self._get_import_key(row.get('maintenance_request_id')))
+                if not request_id:
+                    raise ValueError(_("solicitud de mantenimiento desconocida"))
+                time_type = (row.get('time_type') or 'active').strip()
+                if time_type not in ('active', 'pause'):
+                    raise ValueError(_("tipo de registro desconocido"))
+                start_datetime = fields.Datetime.to_datetime(row.get('start_datetime') or False)
+                end_datetime = fields.Datetime.to_datetime(row.get('end_datetime') or False)
+                if not start_datetime or not end_datetime:
+                    raise ValueError(_("faltan las fechas de inicio o fin"))
+                if end_datetime < start_datetime:
+                    raise ValueError(_("la fecha de fin es anterior a la de inicio"))
+                pause_cause_id = causes.get(self._get_import_key(row.get('pause_cause_id')), False)
+                if time_type == 'pause' and not pause_cause_id:
+                    raise ValueError(_("la pausa no tiene una causa válida"))
+                vals = {
+                    'maintenance_request_id': request_id,
+                    'time_type': time_type,
+                    'pause_cause_id': pause_cause_id,
+                    'start_datetime': start_datetime,
+                    'end_datetime': end_datetime,
+                    'date': start_datetime.date(),
+                    'description': row.get('description') or False,
+                }
+                user_key = self._get_import_key(row.get('user_id'))
+                if user_key:
+                    if user_key not in users:
+                        raise ValueError(_("usuario desconocido"))
+                    vals['user_id'] = users[user_key]
+                elif time_type == 'active':
+                    # Sin técnico, el histórico se imputaría a quien importa y se superpondría
+                    raise ValueError(_("el tiempo activo requiere un técnico (user_id)"))
+                vals_list.append(vals)
+                lines.append(line)
+            except ValueError as error:
+                errors.append(_("Línea %s: %s") % (line, error))
+        if not errors:
+            errors = self._check_import_overlaps(vals_list, lines)
+        if errors:
+            raise ValidationError(_("No se importó ningún registro de tiempo:\n%s") % "\n".join(
+                errors[:IMPORT_MAX_REPORTED_ERRORS]
+            ))
+        return vals_list
+
+    @api.model
+    def _check_import_overlaps(self, vals_list, lines):
+        """Detectar los tramos activos importados que violarían ``user_active_overlap``.
+
+        Se comparan entre sí, ordenados por técnico e inicio, y contra los
+        registros existentes con una sola consulta sobre el índice GiST de la
+        restricción. Devuelve los errores con su número de línea.
+        """
+        active = sorted(
+            (vals['user_id'], vals['start_datetime'], vals['end_datetime'], line)
+            for vals, line in zip(vals_list, lines)
+            if vals['time_type'] == 'active' and vals['end_datetime'] > vals['start_datetime']
+        )
+        overlaps = {}
+        previous = None
+        for user_id, start_datetime, end_datetime, line in active:
+            if previous and previous[0] == user_id and start_datetime < previous[2]:
+                overlaps[line] = _("Línea %s: se superpone con la línea %s del mismo técnico") % (line, previous[3])
+            if not previous or previous[0] != user_id or end_datetime > previous[2]:
+                previous = (user_id, start_datetime, end_datetime, line)
+        if active:
+            self.flush_model(['user_id', 'time_type', 'start_datetime', 'end_datetime'])
+            user_ids, starts, ends, active_lines = (list(column) for column in zip(*active))
+            self.env.cr.execute(
+                """
+                SELECT DISTINCT ON (i.line) i.line, tr.id
+                  FROM unnest(%s::int[], %s::int[], %s::timestamp[], %s::timestamp[])
+                       AS i(line, user_id, start_datetime, end_datetime)
+                  JOIN maintenance_time_records tr
+                    ON tr.user_id = i.user_id
+                   AND tr.time_type = 'active'
+                   AND tsrange(tr.start_datetime, COALESCE(tr.end_datetime, 'infinity'::timestamp), '[)')
+                       && tsrange(i.start_datetime, i.end_datetime, '[)')
+              ORDER BY i.line, tr.id
+                """,
+                (active_lines, user_ids, starts, ends),
+            )
+            for line, record_id in self.env.cr.fetchall():
+                overlaps.setdefault(
+                    line, _("Línea %s: se superpone con el registro de tiempo activo %s del técnico") % (line, record_id)
+                )
+        return [overlaps[line] for line in sorted(overlaps)]
+
+    @api.model
+    def _get_import_key(self, value):
+        return str(value).strip() if value not in (None, False, '') else ''
+
+    @api.model
+    def _resolve_import_references(self, values, model_name, key_field):
+        """Asociar cada valor importado a un id, buscando por ``key_field`` y luego por id."""
+        keys = {self._get_import_key(value) for value in values} - {''}
+        if not keys:
+            return {}
+        model = self.env[model_name].with_context(active_test=False)
+        mapping = {record[key_field]: record.id for record in model.search([(key_field, 'in', list(keys))])}
+        numeric_ids = [int(key) for key in keys - set(mapping) if key.isdigit()]
+        mapping.update({str(record.id): record.id for record in model.browse(numeric_ids).exists()})
+        return mapping
+
+    @api.model
+    def _get_running_timers(self, users):
+        """Tramos activos abiertos de los usuarios, resueltos por el índice único parcial."""
+        return self.search([
+            ('user_id', 'in', users.ids),
+            ('time_type', '=', 'active'),
+            ('end_datetime', '=', False),
+        ])
+
+    @api.model
+    def _get_running_timer(self, user=None):
+        """Devolver el cronómetro en curso del usuario (por defecto, el actual)."""
+        return self._get_running_timers(user or self.env.user)[:1]
 
     @api.model
     def _get_default_analytic_account(self):
-        default_account = self.env['account.analytic.account'].search([], limit=1)
-        if not default_account:
+        account_id = self._get_maintenance_analytic_account_id(self.env.company.id)
+        if not account_id:
             raise ValidationError(_("No hay una cuenta analítica disponible para registrar tiempos."))
-        return default_account
+        return self.env['account.analytic.account'].browse(account_id)
+
+    @api.model
+    def _set_maintenance_analytic_accounts(self, vals_list):
+        """Completar la cuenta analítica según el plan, la categoría o la compañía de cada solicitud.
+
+        Las solicitudes se leen de una vez y la cuenta por defecto se busca
+        una sola vez por compañía del lote.
+        """
+        pending = [
+            vals for vals in vals_list
+            if not vals.get('account_id') and vals.get('maintenance_request_id')
+        ]
+        if not pending:
+            return
+        requests = self.env['maintenance.request'].sudo().browse({vals['maintenance_request_id'] for vals in pending})
+        requests_by_id = {request.id: request for request in requests}
+        fallback_ids = {}
+        for vals in pending:
+            request = requests_by_id[vals['maintenance_request_id']]
+            company_id = vals.get('company_id') or self.env.company.id
+            account = request.maintenance_plan_id.analytic_account_id or request.category_id.analytic_account_id
+            if account:
+                vals['account_id'] = account.id
+                continue
+            if company_id not in fallback_ids:
+                fallback_ids[company_id] = self._get_maintenance_analytic_account_id(company_id)
+            if fallback_ids[company_id]:
+                vals['account_id'] = fallback_ids[company_id]
+
+    @api.model
+    def _get_maintenance_analytic_account_id(self, company_id, plan_id=False, category_id=False):
+        """Resolver la cuenta analítica: plan, categoría, compañía y, por último, la primera cuenta activa."""
+        if plan_id:
+            account = self.env['maintenance.plan'].sudo().browse(plan_id).analytic_account_id
+            if account:
+                return account.id
+        if category_id:
+            account = self.env['maintenance.equipment.category'].sudo().browse(category_id).analytic_account_id
+            if account:
+                return account.id
+        account = self.env['res.company'].sudo().browse(company_id).maintenance_analytic_account_id
+        if account:
+            return account.id
+        return self.env['account.analytic.account'].sudo().search(
+            [('company_id', 'in', [company_id, False])], order='id', limit=1
+        ).id
 
     @api.depends('start_datetime', 'end_datetime')
     def _compute_duration(self):
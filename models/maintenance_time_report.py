@@ -0,0 +1,84 @@
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+REPORT_WATERMARK_PARAM = 'maintenance_time_records.time_report_watermark'
+
+
+class MaintenanceTimeReport(models.Model):
+    _name = 'maintenance.time.report'
+    _description = 'Análisis de tiempos de mantenimiento'
+    _auto = False
+    _order = 'month desc'
+
+    maintenance_request_id = fields.Many2one('maintenance.request', string='Solicitud de mantenimiento', readonly=True)
+    equipment_id = fields.Many2one('maintenance.equipment', string='Equipo', readonly=True)
+    category_id = fields.Many2one('maintenance.equipment.category', string='Categoría', readonly=True)
+    maintenance_plan_id = fields.Many2one('maintenance.plan', string='Plan de mantenimiento', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    user_id = fields.Many2one('res.users', string='Técnico', readonly=True)
+    pause_cause_id = fields.Many2one('maintenance.pause.cause', string='Causa de pausa', readonly=True)
+    month = fields.Date(string='Mes', readonly=True)
+    active_hours = fields.Float(string='Horas activas', readonly=True)
+    pause_hours = fields.Float(string='Horas en pausa', readonly=True)
+    record_count = fields.Integer(string='Registros', readonly=True)
+
+    def _query(self):
+        # El id es el menor registro de tiempo del grupo: estable entre refrescos
+        # y único, como exige REFRESH MATERIALIZED VIEW CONCURRENTLY.
+        return """
+            SELECT MIN(tr.id) AS id,
+                   tr.maintenance_request_id,
+                   r.equipment_id,
+                   r.category_id,
+                   r.maintenance_plan_id,
+                   r.company_id,
+                   tr.user_id,
+                   tr.pause_cause_id,
+                   date_trunc('month', tr.start_datetime)::date AS month,
+                   SUM(CASE WHEN tr.time_type = 'active'
+                            THEN EXTRACT(EPOCH FROM tr.end_datetime - tr.start_datetime) ELSE 0 END) / 3600.0 AS active_hours,
+                   SUM(CASE WHEN tr.time_type = 'pause'
+                            THEN EXTRACT(EPOCH FROM tr.end_datetime - tr.start_datetime) ELSE 0 END) / 3600.0 AS pause_hours,
+                   COUNT(*) AS record_count
+              FROM maintenance_time_records tr
+              JOIN maintenance_request r ON r.id = tr.maintenance_request_id
+             WHERE tr.end_datetime IS NOT NULL
+             GROUP BY tr.maintenance_request_id, r.equipment_id, r.category_id, r.maintenance_plan_id,
+                      r.company_id, tr.user_id, tr.pause_cause_id, date_trunc('month', tr.start_datetime)
+        """
+
+    def init(self):
+        self.env.cr.execute("DROP MATERIALIZED VIEW IF EXISTS %s CASCADE" % self._table)
+        self.env.cr.execute("CREATE MATERIALIZED VIEW %s AS (%s)" % (self._table, self._query()))
+        self.env.cr.execute("CREATE UNIQUE INDEX %s_id_index ON %s (id)" % (self._table, self._table))
+        self.env.cr.execute("CREATE INDEX %s_month_equipment_index ON %s (month, equipment_id)" % (self._table, self._table))
+        self.env['ir.config_parameter'].sudo().set_param(REPORT_WATERMARK_PARAM, self._get_source_watermark())
+
+    @api.model
+    def _get_source_watermark(self):
+        """Firma de los datos de origen: cambia con cualquier alta, edición o baja."""
+        self.env['maintenance.time_records'].flush_model()
+        self.env['maintenance.request'].flush_model(['equipment_id', 'category_id', 'maintenance_plan_id', 'company_id'])
+        self.env.cr.execute(
+            """
+            SELECT (SELECT COUNT(*) FROM maintenance_time_records WHERE end_datetime IS NOT NULL),
+                   (SELECT MAX(write_date) FROM maintenance_time_records),
+                   (SELECT MAX(write_date) FROM maintenance_request)
+            """
+        )
+        return '|'.join(str(value) for value in self.env.cr.fetchone())
+
+    @api.model
+    def _refresh_report(self, force=False):
+        """Refrescar la vista materializada sin bloquear las lecturas, solo si el origen cambió."""
+        params = self.env['ir.config_parameter'].sudo()
+        watermark = self._get_source_watermark()
+        if not force and params.get_param(REPORT_WATERMARK_PARAM) == watermark:
+            return False
+        self.env.cr.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY %s" % self._table)
+        params.set_param(REPORT_WATERMARK_PARAM, watermark)
+        self.invalidate_model()
+        _logger.info("Análisis de tiempos de mantenimiento refrescado")
+        return True
@@ -0,0 +1,239 @@
+from datetime import timedelta, timezone
+from dateutil.parser import isoparse
+from odoo import _, api, fields, models
+from odoo.exceptions import AccessError, UserError, ValidationError
+import logging
+import psycopg2
+
+_logger = logging.getLogger(__name__)
+
+# Estado del cronómetro que admite cada evento, igual que los botones del formulario
+TIMER_EVENT_ALLOWED_STATES = {
+    'start': 'idle',
+    'pause': 'active',
+    'continue': 'pause',
+    'finish': 'active',
+}
+# Desfase máximo aceptado entre el reloj del dispositivo y el del servidor
+TIMER_EVENT_MAX_SKEW = timedelta(minutes=5)
+
+
+class MaintenanceTimerEvent(models.Model):
+    _name = 'maintenance.timer.event'
+    _description = 'Evento de cronómetro sincronizado desde un dispositivo'
+    _order = 'event_datetime, id'
+
+    idempotency_key = fields.Char(string='Clave de idempotencia', required=True, readonly=True)
+    maintenance_request_id = fields.Many2one(
+        'maintenance.request', string='Solicitud de mantenimiento', readonly=True, ondelete='cascade', index=True
+    )
+    user_id = fields.Many2one('res.users', string='Técnico', required=True, readonly=True)
+    event_type = fields.Selection(
+        [
+            ('start', 'Iniciar'),
+            ('pause', 'Pausar'),
+            ('continue', 'Continuar'),
+            ('finish', 'Finalizar'),
+        ],
+        string='Evento', readonly=True
+    )
+    event_datetime = fields.Datetime(string='Fecha del evento', readonly=True)
+    pause_cause_id = fields.Many2one('maintenance.pause.cause', string='Causa de pausa', readonly=True)
+    state = fields.Selection(
+        [('applied', 'Aplicado'), ('rejected', 'Rechazado')],
+        string='Estado', readonly=True
+    )
+    message = fields.Char(string='Mensaje', readonly=True)
+
+    _sql_constraints = [
+        # Las claves las genera cada dispositivo: solo son únicas por técnico
+        ('idempotency_key_unique', 'unique(user_id, idempotency_key)', 'La clave de idempotencia ya fue sincronizada.'),
+    ]
+
+    @api.model
+    def _parse_event_datetime(self, value):
+        """Convertir una fecha ISO 8601 del dispositivo a UTC sin zona horaria."""
+        event_datetime = isoparse(value)
+        if event_datetime.tzinfo:
+            event_datetime = event_datetime.astimezone(timezone.utc).replace(tzinfo=None)
+        return event_datetime.replace(microsecond=0)
+
+    @api.model
+    def _sync_events(self, events):
+        """Reproducir en orden un lote de eventos de cronómetro registrados sin conexión.
+
+        Cada evento es un diccionario con ``key``, ``request_id``, ``type``
+        (``start``, ``pause``, ``continue`` o ``finish``), ``datetime`` en ISO
+        8601 y, para las pausas, ``pause_cause_id``. Las claves ya sincronizadas
+        por el usuario se descartan con una sola inserción sobre el índice
+        único, de modo que reenviar un lote es inocuo. Devuelve un resultado por
+        cada evento enviado, en el mismo orden; una clave repetida dentro del
+        lote se informa como ``duplicate``.
+        """
+        self.check_access_rights('create')
+        results = {}
+        submitted = []
+        parsed = []
+        for event in events:
+            key = event.get('key')
+            if not key:
+                submitted.append((key, {'key': key, 'status': 'rejected', 'message': _("Evento sin clave de idempotencia.")}))
+                continue
+            if key in results:
+                submitted.append((key, {'key': key, 'status': 'duplicate'}))
+                continue
+            submitted.append((key, None))
+            try:
+                event_type = event['type']
+                if event_type not in TIMER_EVENT_ALLOWED_STATES:
+                    raise ValueError(event_type)
+                parsed.append({
+                    'key': key,
+                    'request_id': int(event['request_id']),
+                    'type': event_type,
+                    'datetime': self._parse_event_datetime(event['datetime']),
+                    'pause_cause_id': int(event['pause_cause_id']) if event.get('pause_cause_id') else False,
+                })
+                results[key] = {'key': key, 'status': 'pending'}
+            except (KeyError, TypeError, ValueError):
+                results[key] = {'key': key, 'status': 'rejected', 'message': _("Evento mal formado.")}
+        if not parsed:
+            return self._get_sync_response(submitted, results)
+
+        new_keys = self._register_event_keys(parsed)
+        for event in parsed:
+            if event['key'] not in new_keys:
+                results[event['key']] = {'key': event['key'], 'status': 'duplicate'}
+        pending = sorted(
+            (event for event in parsed if event['key'] in new_keys),
+            key=lambda event: event['datetime'],
+        )
+
+        requests = self.env['maintenance.request'].browse({event['request_id'] for event in pending}).exists()
+        last_starts = self._get_last_record_starts(requests)
+        requests_by_id = {request.id: request for request in requests}
+        pause_causes = self.env['maintenance.pause.cause'].browse(
+            {event['pause_cause_id'] for event in pending if event['pause_cause_id']}
+        ).exists()
+        pause_causes_by_id = {cause.id: cause for cause in pause_causes}
+        limit = fields.Datetime.now() + TIMER_EVENT_MAX_SKEW
+        for event in pending:
+            request = requests_by_id.get(event['request_id'])
+            pause_cause = pause_causes_by_id.get(event['pause_cause_id'])
+            try:
+                with self.env.cr.savepoint():
+                    if not request:
+                        raise UserError(_("La solicitud de mantenimiento no existe."))
+                    if event['datetime'] > limit:
+                        raise UserError(_("La fecha del evento está en el futuro."))
+                    if event['datetime'] < last_starts.get(request.id, event['datetime']):
+                        raise UserError(_("El evento es anterior al último registro de tiempo de la solicitud."))
+                    if request.time_state != TIMER_EVENT_ALLOWED_STATES[event['type']]:
+                        raise UserError(_("El evento no es válido en el estado actual del cronómetro."))
+                    self._apply_event(request, event, pause_cause)
+                last_starts[request.id] = event['datetime']
+                results[event['key']] = {'key': event['key'], 'status': 'applied'}
+            except (AccessError, UserError, ValidationError) as error:
+                results[event['key']] = {'key': event['key'], 'status': 'rejected', 'message': str(error)}
+            except psycopg2.IntegrityError:
+                results[event['key']] = {
+                    'key': event['key'],
+                    'status': 'rejected',
+                    'message': _("El evento se superpone con otro tramo activo del técnico."),
+                }
+
+        self._write_event_results([event['key'] for event in pending], results)
+        response = self._get_sync_response(submitted, results)
+        _logger.info(
+            "Sincronización de cronómetros: %s eventos, %s aplicados, %s duplicados",
+            len(response),
+            sum(1 for result in response if result['status'] == 'applied'),
+            sum(1 for result in response if result['status'] == 'duplicate'),
+        )
+        return response
+
+    @api.model
+    def _get_sync_response(self, submitted, results):
+        # Las repeticiones dentro del lote ya traen su resultado; el resto se resuelve por clave
+        return [result or results[key] for key, result in submitted]
+
+    @api.model
+    def _register_event_keys(self, parsed):
+        """Insertar los eventos nuevos y devolver sus claves; las ya sincronizadas por el usuario se ignoran."""
+        self.env.cr.execute(
+            """
+            INSERT INTO maintenance_timer_event (
+                idempotency_key, maintenance_request_id, user_id, event_type, event_datetime, pause_cause_id,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT key, request.id, %(uid)s, event_type, event_datetime, cause.id,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(keys)s::varchar[], %(request_ids)s::int[], %(types)s::varchar[],
+                          %(datetimes)s::timestamp[], %(cause_ids)s::int[])
+                   AS event(key, request_id, event_type, event_datetime, cause_id)
+              LEFT JOIN maintenance_request request ON request.id = event.request_id
+              LEFT JOIN maintenance_pause_cause cause ON cause.id = event.cause_id
+            ON CONFLICT (user_id, idempotency_key) DO NOTHING
+            RETURNING idempotency_key
+            """,
+            {
+                'uid': self.env.uid,
+                'keys': [event['key'] for event in parsed],
+                'request_ids': [event['request_id'] for event in parsed],
+                'types': [event['type'] for event in parsed],
+                'datetimes': [event['datetime'] for event in parsed],
+                'cause_ids': [event['pause_cause_id'] or None for event in parsed],
+            },
+        )
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _get_last_record_starts(self, requests):
+        if not requests:
+            return {}
+        self.env['maintenance.time_records'].flush_model(['maintenance_request_id', 'start_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT maintenance_request_id, MAX(start_datetime)
+              FROM maintenance_time_records
+             WHERE maintenance_request_id = ANY(%s)
+             GROUP BY maintenance_request_id
+            """,
+            (requests.ids,),
+        )
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _apply_event(self, request, event, pause_cause):
+        at = event['datetime']
+        rejected = {}
+        if event['type'] == 'start':
+            __, rejected = request._start_time(at)
+        elif event['type'] == 'continue':
+            __, rejected = request._continue_time(at)
+        elif event['type'] == 'finish':
+            request._finish_time(at)
+        else:
+            if not pause_cause:
+                raise UserError(_("Debe indicar la causa de la pausa."))
+            request._pause_time(pause_cause, at)
+        if rejected:
+            raise UserError(next(iter(rejected.values())))
+
+    @api.model
+    def _write_event_results(self, keys, results):
+        self.env.cr.execute(
+            """
+            UPDATE maintenance_timer_event event
+               SET state = result.state, message = result.message
+              FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[]) AS result(key, state, message)
+             WHERE event.user_id = %s
+               AND event.idempotency_key = result.key
+            """,
+            (
+                keys,
+                [results[key]['status'] for key in keys],
+                [results[key].get('message') for key in keys],
+                self.env.uid,
+            ),
+        )
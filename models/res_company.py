@@ -0,0 +1,12 @@
+from odoo import fields, models
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    maintenance_analytic_account_id = fields.Many2one(
+        'account.analytic.account',
+        string="Cuenta analítica de mantenimiento",
+        ondelete='set null',
+        help="Cuenta analítica por defecto de los registros de tiempo de mantenimiento."
+    )
@@ -0,0 +1,6 @@
+from . import test_finish_confirmation
+from . import test_maintenance_plan
+from . import test_performance
+from . import test_time_export
+from . import test_time_records
+from . import test_timer_sync
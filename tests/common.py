@@ -0,0 +1,56 @@
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import TransactionCase
+
+
+class MaintenanceTimeRecordsCase(TransactionCase):
+    """Equipos, planes y técnicos mínimos para las pruebas de comportamiento."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        analytic_plan = cls.env['account.analytic.plan'].create({'name': 'Mantenimiento (pruebas)'})
+        cls.analytic_account = cls.env['account.analytic.account'].create({
+            'name': 'Mantenimiento (pruebas)',
+            'plan_id': analytic_plan.id,
+            'company_id': cls.env.company.id,
+        })
+        cls.env.company.maintenance_analytic_account_id = cls.analytic_account
+        cls.category = cls.env['maintenance.equipment.category'].create({'name': 'Pruebas'})
+        cls.pause_cause = cls.env['maintenance.pause.cause'].create({'name': 'Pruebas'})
+        technician_groups = [(6, 0, [cls.env.ref('base.group_user').id])]
+        cls.technician = cls.env['res.users'].create({
+            'name': 'Técnico uno',
+            'login': 'maintenance_technician_1',
+            'groups_id': technician_groups,
+        })
+        cls.other_technician = cls.env['res.users'].create({
+            'name': 'Técnico dos',
+            'login': 'maintenance_technician_2',
+            'groups_id': technician_groups,
+        })
+
+    @classmethod
+    def _create_equipments_with_plans(cls, count, start_date=None, interval=1, interval_step='month'):
+        start_date = start_date or fields.Date.today() - timedelta(days=60)
+        equipments = cls.env['maintenance.equipment'].create([{
+            'name': f'Equipo de prueba {index}',
+            'category_id': cls.category.id,
+        } for index in range(count)])
+        plans = cls.env['maintenance.plan'].create([{
+            'name': f'Plan {equipment.name}',
+            'equipment_id': equipment.id,
+            'interval': interval,
+            'interval_step': interval_step,
+            'maintenance_plan_horizon': 1,
+            'planning_step': 'year',
+            'start_maintenance_date': start_date,
+        } for equipment in equipments])
+        return equipments, plans
+
+    @classmethod
+    def _create_requests(cls, count, **vals):
+        return cls.env['maintenance.request'].create([dict({
+            'name': f'Solicitud de prueba {index}',
+            'maintenance_type': 'corrective',
+        }, **vals) for index in range(count)])
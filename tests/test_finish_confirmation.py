@@ -0,0 +1,67 @@
+from odoo import fields
+from odoo.tests import tagged
+from odoo.addons.maintenance_time_records.models.maintenance_stage import (
+    STAGE_ROLE_CANCELLED,
+    STAGE_ROLE_DONE,
+    STAGE_ROLE_NEW,
+    STAGE_ROLE_REVISION,
+)
+from .common import MaintenanceTimeRecordsCase
+
+
+@tagged('post_install', '-at_install')
+class TestFinishConfirmation(MaintenanceTimeRecordsCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        stages = cls.env['maintenance.stage']
+        cls.stage_new = stages._get_stage_for_role(STAGE_ROLE_NEW)
+        cls.stage_revision = stages._get_stage_for_role(STAGE_ROLE_REVISION)
+        cls.stage_done = stages._get_stage_for_role(STAGE_ROLE_DONE)
+        cls.stage_cancelled = stages._get_stage_for_role(STAGE_ROLE_CANCELLED)
+        cls.equipments, cls.plans = cls._create_equipments_with_plans(3)
+        cls.requests = cls.env['maintenance.request'].create([{
+            'name': f'Solicitud {plan.name}',
+            'equipment_id': plan.equipment_id.id,
+            'maintenance_plan_id': plan.id,
+            'maintenance_type': 'preventive',
+            'stage_id': cls.stage_new.id,
+            'schedule_date': fields.Datetime.now(),
+        } for plan in cls.plans])
+        cls.requests[:2].write({'stage_id': cls.stage_revision.id})
+
+    def _count_requests_by_plan(self):
+        return {
+            plan.id: self.env['maintenance.request'].search_count([('maintenance_plan_id', '=', plan.id)])
+            for plan in self.plans
+        }
+
+    def _get_wizard(self, requests, **vals):
+        return self.env['maintenance.request.finish.confirmation'].with_context(
+            active_ids=requests.ids, active_model='maintenance.request'
+        ).create(vals)
+
+    def test_bulk_finish_creates_next_requests(self):
+        counts_before = self._count_requests_by_plan()
+        action = self._get_wizard(self.requests).action_confirm_finish()
+
+        # La solicitud que no está en revisión se omite y se informa
+        self.assertEqual(action['tag'], 'display_notification')
+        self.assertIn(self.requests[2].display_name, action['params']['message'])
+        self.assertEqual(self.requests[:2].stage_id, self.stage_done)
+        self.assertTrue(all(self.requests[:2].mapped('check_date_time')))
+        self.assertEqual(self.requests[2].stage_id, self.stage_new)
+
+        counts_after = self._count_requests_by_plan()
+        self.assertEqual(counts_after[self.plans[0].id], counts_before[self.plans[0].id] + 1)
+        self.assertEqual(counts_after[self.plans[1].id], counts_before[self.plans[1].id] + 1)
+        self.assertEqual(counts_after[self.plans[2].id], counts_before[self.plans[2].id])
+
+    def test_cancel_does_not_require_review(self):
+        counts_before = self._count_requests_by_plan()
+        action = self._get_wizard(self.requests, create_next_request=False).action_confirm_cancelled()
+
+        self.assertEqual(action, {'type': 'ir.actions.act_window_close'})
+        self.assertEqual(self.requests.stage_id, self.stage_cancelled)
+        self.assertEqual(self._count_requests_by_plan(), counts_before)
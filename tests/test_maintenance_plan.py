@@ -0,0 +1,51 @@
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from odoo import fields
+from odoo.tests import tagged
+from .common import MaintenanceTimeRecordsCase
+
+
+@tagged('post_install', '-at_install')
+class TestMaintenancePlanForecast(MaintenanceTimeRecordsCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        today = fields.Date.today()
+        # Fin de mes y años bisiestos: el recorte del día debe arrastrarse igual que con relativedelta
+        month_end = date(today.year - 1, 1, 31)
+        cases = [
+            (1, 'day', today - relativedelta(days=3)),
+            (2, 'week', today - relativedelta(days=10)),
+            (1, 'month', month_end),
+            (3, 'month', month_end),
+            (1, 'year', date(2020, 2, 29)),
+        ]
+        cls.plans = cls.env['maintenance.plan']
+        for interval, interval_step, start_date in cases:
+            __, plan = cls._create_equipments_with_plans(
+                1, start_date=start_date, interval=interval, interval_step=interval_step
+            )
+            cls.plans |= plan
+        # Un plan con solicitudes: la proyección parte de la más lejana
+        plan = cls.plans[2]
+        cls.env['maintenance.request'].create({
+            'name': f'Solicitud {plan.name}',
+            'equipment_id': plan.equipment_id.id,
+            'maintenance_plan_id': plan.id,
+            'maintenance_type': 'preventive',
+            'request_date': month_end + relativedelta(months=3),
+        })
+
+    def test_forecast_matches_pending_occurrences(self):
+        today = fields.Date.today()
+        horizon_date = today + relativedelta(years=2)
+        furthest_dates = self.plans._get_furthest_request_dates()
+        self.assertIn(self.plans[2].id, furthest_dates)
+        forecast = self.plans._get_forecast_dates(today, horizon_date)
+        for plan in self.plans:
+            expected = plan._get_pending_occurrence_dates(furthest_dates.get(plan.id), today, horizon_date)
+            self.assertTrue(expected, "Cada plan debe tener ocurrencias hasta el horizonte")
+            self.assertEqual(forecast[plan.id], expected, plan.interval_step)
+        # Una segunda llamada se sirve de la caché con el mismo resultado
+        self.assertEqual(self.plans._get_forecast_dates(today, horizon_date), forecast)
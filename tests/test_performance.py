@@ -0,0 +1,167 @@
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.addons.maintenance_time_records.models.maintenance_equipment import QR_BATCH_SIZE
+from odoo.addons.maintenance_time_records.models.maintenance_stage import STAGE_ROLE_IN_PROGRESS, STAGE_ROLE_NEW
+import logging
+import math
+import os
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Cantidad máxima de consultas SQL por camino crítico (por lote, en las
+# etiquetas QR). No dependen del tamaño de la flota: un camino que escala con
+# el histórico las supera. Se pueden ajustar con MAINTENANCE_PERF_QUERY_BUDGETS,
+# por ejemplo "timer_start=50,stage_write=45".
+QUERY_BUDGETS = {
+    'stage_write': 40,
+    'timer_start': 45,
+    'timer_pause': 35,
+    'timer_continue': 35,
+    'timer_finish': 45,
+    'create_new_request': 60,
+    'compute_status': 15,
+    'month_filters': 10,
+    'generate_qr_code': 10,
+}
+
+
+def _get_query_budgets():
+    budgets = dict(QUERY_BUDGETS)
+    for item in filter(None, os.environ.get('MAINTENANCE_PERF_QUERY_BUDGETS', '').split(',')):
+        path, __, count = item.partition('=')
+        budgets[path.strip()] = int(count)
+    return budgets
+
+
+@tagged('post_install', '-at_install')
+class TestMaintenancePerformance(TransactionCase):
+    # Tamaño de la flota sintética, ajustable por entorno para medir flotas grandes
+    equipment_count = int(os.environ.get('MAINTENANCE_PERF_EQUIPMENT_COUNT', 50))
+    requests_per_equipment = int(os.environ.get('MAINTENANCE_PERF_REQUESTS_PER_EQUIPMENT', 12))
+    pause_cycles = int(os.environ.get('MAINTENANCE_PERF_PAUSE_CYCLES', 200))
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.query_budgets = _get_query_budgets()
+        today = fields.Date.today()
+        category = cls.env['maintenance.equipment.category'].create({'name': 'Benchmark'})
+        cls.equipments = cls.env['maintenance.equipment'].create([{
+            'name': f'Equipo benchmark {index:05d}',
+            'category_id': category.id,
+        } for index in range(cls.equipment_count)])
+        cls.plans = cls.env['maintenance.plan'].create([{
+            'name': f'Plan benchmark {equipment.name}',
+            'equipment_id': equipment.id,
+            'interval': 1,
+            'interval_step': 'month',
+            'maintenance_plan_horizon': 1,
+            'planning_step': 'year',
+            'start_maintenance_date': today - timedelta(days=30 * cls.requests_per_equipment),
+        } for equipment in cls.equipments])
+
+        request_vals = []
+        for plan in cls.plans:
+            for index in range(cls.requests_per_equipment):
+                request_date = today - timedelta(days=30 * (cls.requests_per_equipment - index))
+                request_vals.append({
+                    'name': f'{plan.equipment_id.name} (benchmark)',
+                    'equipment_id': plan.equipment_id.id,
+                    'maintenance_plan_id': plan.id,
+                    'maintenance_type': 'corrective' if index % 5 == 0 else 'preventive',
+                    'request_date': request_date,
+                    'schedule_date': fields.Datetime.to_datetime(request_date),
+                })
+        cls.requests = cls.env['maintenance.request'].create(request_vals)
+
+        # Una solicitud con un histórico largo de ciclos de pausa
+        cls.long_request = cls.requests[-1]
+        cls.idle_request = cls.requests[0]
+        cls.pause_cause = cls.env['maintenance.pause.cause'].search([], limit=1) or \
+            cls.env['maintenance.pause.cause'].create({'name': 'Benchmark'})
+        start = fields.Datetime.now() - timedelta(minutes=10 * cls.pause_cycles + 10)
+        record_vals = []
+        for cycle in range(cls.pause_cycles):
+            cycle_start = start + timedelta(minutes=10 * cycle)
+            record_vals.append({
+                'maintenance_request_id': cls.long_request.id,
+                'time_type': 'active',
+                'start_datetime': cycle_start,
+                'end_datetime': cycle_start + timedelta(minutes=7),
+            })
+            record_vals.append({
+                'maintenance_request_id': cls.long_request.id,
+                'time_type': 'pause',
+                'pause_cause_id': cls.pause_cause.id,
+                'start_datetime': cycle_start + timedelta(minutes=7),
+                'end_datetime': cycle_start + timedelta(minutes=10),
+            })
+        # El último tramo queda abierto: la solicitud está en pausa
+        record_vals[-1]['end_datetime'] = False
+        cls.env['maintenance.time_records'].create(record_vals)
+        cls.equipments.generate_qr_code()
+
+    def _assert_budget(self, path, func, batches=1):
+        """Fallar si ``func`` ejecuta más consultas que el presupuesto del camino.
+
+        La cantidad de consultas y el tiempo de reloj se registran en el log.
+        """
+        budget = self.query_budgets[path] * batches
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries_before = self.cr.sql_log_count
+        started = time.perf_counter()
+        with self.assertQueryCount(budget):
+            func()
+        _logger.info(
+            "Rendimiento %-20s %5s consultas (presupuesto %s) %8.3f s (flota de %s equipos)",
+            path, self.cr.sql_log_count - queries_before, budget,
+            time.perf_counter() - started, self.equipment_count,
+        )
+
+    def test_stage_write(self):
+        stages = self.env['maintenance.stage']
+        stage_in_progress = stages._get_stage_for_role(STAGE_ROLE_IN_PROGRESS)
+        batch = self.requests.filtered(
+            lambda r: r.stage_id == stages._get_stage_for_role(STAGE_ROLE_NEW)
+            and r not in self.long_request | self.idle_request
+        )[:20]
+        self._assert_budget('stage_write', lambda: batch.write({'stage_id': stage_in_progress.id}))
+
+    def test_timer_continue(self):
+        self._assert_budget('timer_continue', lambda: self.long_request.action_continue_time())
+
+    def test_timer_pause(self):
+        self._assert_budget('timer_pause', lambda: self.long_request._pause_time(self.pause_cause))
+
+    def test_timer_start(self):
+        self._assert_budget('timer_start', lambda: self.idle_request.action_start_time())
+
+    def test_timer_finish(self):
+        self.idle_request.action_start_time()
+        self._assert_budget('timer_finish', lambda: self.idle_request.action_finish_time())
+
+    def test_create_new_request(self):
+        self._assert_budget('create_new_request', lambda: self.equipments[:1]._create_new_request(self.plans[:1]))
+
+    def test_compute_status(self):
+        self._assert_budget('compute_status', lambda: self.equipments._compute_status())
+
+    def test_month_filters(self):
+        request_model = self.env['maintenance.request']
+        self._assert_budget('month_filters', lambda: (
+            request_model.search_count([('is_previous_month', '=', True)]),
+            request_model.search_count([('is_current_month', '=', True)]),
+        ))
+
+    def test_generate_qr_code(self):
+        # Forzar el renderizado: en setUpClass todas las etiquetas ya están al día
+        self._assert_budget(
+            'generate_qr_code', lambda: self.equipments.generate_qr_code(force=True),
+            batches=math.ceil(len(self.equipments) / QR_BATCH_SIZE),
+        )
+
+    def test_generate_qr_code_unchanged(self):
+        self._assert_budget('generate_qr_code', lambda: self.equipments.generate_qr_code())
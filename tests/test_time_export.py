@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from odoo import fields
+from odoo.tests import tagged
+from odoo.addons.maintenance_time_records.models.maintenance_time_export import EXPORT_DIRECTORY_PARAM
+from .common import MaintenanceTimeRecordsCase
+import csv
+import os
+import shutil
+import tempfile
+
+
+@tagged('post_install', '-at_install')
+class TestTimeExport(MaintenanceTimeRecordsCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        request = cls._create_requests(1, user_id=cls.technician.id)
+        cls.records = cls.env['maintenance.time_records'].create([{
+            'maintenance_request_id': request.id,
+            'user_id': cls.technician.id,
+            'time_type': 'active',
+            'start_datetime': datetime(2024, 3, 1, hour),
+            'end_datetime': datetime(2024, 3, 1, hour, 30),
+        } for hour in (8, 9, 10)])
+        # Marcas de modificación controladas: la segunda cae justo en el límite de la primera exportación
+        cls.base_date = fields.Datetime.now().replace(microsecond=0) - timedelta(hours=4)
+        cls.env.flush_all()
+        cls.env.cr.execute(
+            """
+            UPDATE maintenance_time_records tr
+               SET write_date = data.write_date
+              FROM unnest(%s::int[], %s::timestamp[]) AS data(id, write_date)
+             WHERE tr.id = data.id
+            """,
+            (cls.records.ids, [cls.base_date + timedelta(hours=index) for index in range(3)]),
+        )
+        cls.records.invalidate_recordset(['write_date'])
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.env['ir.config_parameter'].sudo().set_param(EXPORT_DIRECTORY_PARAM, self.directory)
+        self.export = self.env['maintenance.time.export']
+
+    def _run_export(self, until):
+        with patch.object(type(self.export), '_get_export_until', return_value=until):
+            self.export._cron_export_time_records(feed='test')
+        exported_ids = []
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            with open(path, newline='') as fileobj:
+                exported_ids += [int(row[0]) for row in list(csv.reader(fileobj))[1:]]
+            os.remove(path)
+        return [record_id for record_id in exported_ids if record_id in self.records.ids]
+
+    def _get_watermark(self):
+        param = self.export._get_watermark_param('test')
+        return self.env['ir.config_parameter'].sudo().get_param(param)
+
+    def test_watermark_advances_without_loss(self):
+        first_until = self.base_date + timedelta(hours=1)
+        self.assertEqual(self._run_export(first_until), self.records[:1].ids)
+        self.assertEqual(self._get_watermark(), fields.Datetime.to_string(first_until))
+
+        # La fila escrita exactamente en el límite entra en la ejecución siguiente
+        second_until = self.base_date + timedelta(hours=3)
+        self.assertEqual(self._run_export(second_until), self.records[1:].ids)
+        self.assertEqual(self._get_watermark(), fields.Datetime.to_string(second_until))
+
+        self.assertEqual(self._run_export(second_until), [])
+
+    def test_export_until_never_goes_back(self):
+        until = self.export._get_export_until()
+        self.assertLessEqual(until, fields.Datetime.now() - timedelta(seconds=60))
+        since = fields.Datetime.to_string(fields.Datetime.now() + timedelta(hours=1))
+        with self.assertLogs('odoo.addons.maintenance_time_records.models.maintenance_time_export', 'WARNING'):
+            self.assertEqual(self.export._get_export_until(since), fields.Datetime.to_datetime(since))
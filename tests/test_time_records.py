@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from odoo import fields
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+from psycopg2 import IntegrityError
+from .common import MaintenanceTimeRecordsCase
+
+
+@tagged('post_install', '-at_install')
+class TestTimeRecords(MaintenanceTimeRecordsCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.requests = cls._create_requests(2, user_id=cls.technician.id)
+
+    def _create_active(self, request, start, end, user=None):
+        record = self.env['maintenance.time_records'].create({
+            'maintenance_request_id': request.id,
+            'user_id': (user or self.technician).id,
+            'time_type': 'active',
+            'start_datetime': start,
+            'end_datetime': end,
+        })
+        self.env.flush_all()
+        return record
+
+    def test_overlapping_active_records(self):
+        self._create_active(self.requests[0], datetime(2024, 3, 1, 10), datetime(2024, 3, 1, 11))
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'), self.cr.savepoint():
+            self._create_active(self.requests[1], datetime(2024, 3, 1, 10, 30), datetime(2024, 3, 1, 11, 30))
+        # Tramos contiguos ([inicio, fin)) y tramos de otro técnico no se superponen
+        self._create_active(self.requests[1], datetime(2024, 3, 1, 11), datetime(2024, 3, 1, 12))
+        self._create_active(
+            self.requests[1], datetime(2024, 3, 1, 10, 30), datetime(2024, 3, 1, 11, 30), user=self.other_technician
+        )
+
+    def test_one_open_active_record_per_user(self):
+        self.cr.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = 'maintenance_time_records_user_open_active_index'"
+        )
+        self.assertIn('UNIQUE', self.cr.fetchone()[0])
+
+        requests = self.requests.with_user(self.technician)
+        self.assertFalse(requests[0].action_start_time())
+        notification = requests[1].action_start_time()
+        self.assertEqual(notification['tag'], 'display_notification')
+        self.assertFalse(self.requests[1].time_record_ids)
+        self.assertEqual(self.requests[0].time_state, 'active')
+
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'), self.cr.savepoint():
+            self._create_active(self.requests[1], fields.Datetime.now(), False)
+
+    def test_fold_pending_active_duration(self):
+        request = self.requests[0].with_user(self.technician)
+        now = fields.Datetime.now()
+        request._start_time(now - timedelta(hours=2))
+        request._pause_time(self.pause_cause, now - timedelta(hours=1))
+        active_record = request.time_record_ids.filtered(lambda r: r.time_type == 'active')
+        self.assertTrue(active_record.active_duration_pending)
+        self.assertEqual(self.requests[0].active_duration_closed_seconds, 0)
+        # El tiempo pendiente ya se suma al leer, antes de consolidarlo
+        self.assertAlmostEqual(self.requests[0].total_active_duration_hours, 1.0, places=2)
+
+        self.assertEqual(self.env['maintenance.time_records']._cron_fold_pending_active_duration(), 1)
+        self.requests.invalidate_recordset()
+        self.assertFalse(active_record.active_duration_pending)
+        self.assertEqual(self.requests[0].active_duration_closed_seconds, 3600)
+        self.assertAlmostEqual(self.requests[0].total_active_duration_hours, 1.0, places=2)
+        self.assertEqual(self.env['maintenance.time_records']._cron_fold_pending_active_duration(), 0)
+
+    def test_search_time_state(self):
+        idle, paused = self.requests
+        active, done = self._create_requests(2, user_id=self.other_technician.id)
+        now = fields.Datetime.now()
+        paused.with_user(self.technician)._start_time(now - timedelta(hours=1))
+        paused.with_user(self.technician)._pause_time(self.pause_cause, now - timedelta(minutes=30))
+        done.with_user(self.other_technician)._start_time(now - timedelta(hours=1))
+        done.with_user(self.other_technician)._finish_time(now - timedelta(minutes=30))
+        active.with_user(self.other_technician)._start_time(now - timedelta(minutes=10))
+
+        requests = idle | paused | active | done
+        request_model = self.env['maintenance.request']
+        for state, expected in (('idle', idle), ('active', active), ('pause', paused), ('done', done)):
+            self.assertEqual(request_model.search([('id', 'in', requests.ids), ('time_state', '=', state)]), expected)
+            self.assertEqual(requests.filtered(lambda r: r.time_state == state), expected)
+        self.assertEqual(
+            request_model.search([('id', 'in', requests.ids), ('time_state', 'not in', ['idle', 'done'])]),
+            active | paused,
+        )
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from odoo import fields
+from odoo.tests import tagged
+from .common import MaintenanceTimeRecordsCase
+
+
+@tagged('post_install', '-at_install')
+class TestTimerSync(MaintenanceTimeRecordsCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.request = cls._create_requests(1, user_id=cls.technician.id)
+        cls.other_request = cls._create_requests(1, user_id=cls.other_technician.id)
+
+    def _get_events(self, request, prefix=''):
+        now = fields.Datetime.now()
+        return [
+            {
+                'key': prefix + 'start',
+                'request_id': request.id,
+                'type': 'start',
+                'datetime': (now - timedelta(minutes=20)).isoformat(),
+            },
+            {
+                'key': prefix + 'pause',
+                'request_id': request.id,
+                'type': 'pause',
+                'datetime': (now - timedelta(minutes=10)).isoformat(),
+                'pause_cause_id': self.pause_cause.id,
+            },
+        ]
+
+    def _sync(self, user, events):
+        return self.env['maintenance.timer.event'].with_user(user)._sync_events(events)
+
+    def test_replay_is_idempotent(self):
+        events = self._get_events(self.request)
+        results = self._sync(self.technician, events)
+        self.assertEqual([result['status'] for result in results], ['applied', 'applied'])
+        self.assertEqual(len(self.request.time_record_ids), 2)
+        self.assertEqual(self.request.time_state, 'pause')
+
+        results = self._sync(self.technician, events)
+        self.assertEqual([result['key'] for result in results], ['start', 'pause'])
+        self.assertEqual([result['status'] for result in results], ['duplicate', 'duplicate'])
+        self.request.invalidate_recordset()
+        self.assertEqual(len(self.request.time_record_ids), 2)
+        self.assertEqual(self.request.time_state, 'pause')
+
+    def test_duplicate_key_in_batch(self):
+        events = self._get_events(self.request)
+        results = self._sync(self.technician, events + events[:1])
+        self.assertEqual(len(results), 3, "Cada evento enviado debe tener su resultado")
+        self.assertEqual([result['status'] for result in results], ['applied', 'applied', 'duplicate'])
+        self.assertEqual(len(self.request.time_record_ids), 2)
+
+    def test_keys_are_scoped_per_user(self):
+        self._sync(self.technician, self._get_events(self.request))
+        results = self._sync(self.other_technician, self._get_events(self.other_request))
+        self.assertEqual([result['status'] for result in results], ['applied', 'applied'])
+        self.assertEqual(self.other_request.time_record_ids.user_id, self.other_technician)
+        events = self.env['maintenance.timer.event'].search([('idempotency_key', '=', 'start')])
+        self.assertEqual(events.user_id, self.technician | self.other_technician)
+        self.assertEqual(set(events.mapped('state')), {'applied'})